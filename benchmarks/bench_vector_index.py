@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_chroma import Chroma
+from services.vector_index import NumpyVectorIndex
+
+
+def percentile(values, q):
+    return float(np.percentile(np.asarray(values), q)) * 1000
+
+
+def run_queries(search, queries, k):
+    latencies = []
+    start = time.perf_counter()
+    for query in queries:
+        t0 = time.perf_counter()
+        search(query, k)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    return {
+        "qps": len(queries) / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chroma vs NumPy retriever benchmark")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((args.chunks, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32).tolist()
+
+    ids = [f"doc{i // 3}:{i % 3}" for i in range(args.chunks)]
+    texts = [f"Nội dung chunk {i}" for i in range(args.chunks)]
+    metadatas = [{"id": f"doc{i // 3}"} for i in range(args.chunks)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chroma = Chroma(collection_name="bench", persist_directory=os.path.join(tmp, "chroma"))
+        for start in range(0, args.chunks, 1000):
+            chroma._collection.add(
+                ids=ids[start:start + 1000],
+                embeddings=vectors[start:start + 1000],
+                documents=texts[start:start + 1000],
+                metadatas=metadatas[start:start + 1000]
+            )
+
+        index_path = os.path.join(tmp, "numpy")
+        NumpyVectorIndex.from_chroma(chroma).save(index_path)
+        in_memory = NumpyVectorIndex.load(index_path, mmap=False)
+        mapped = NumpyVectorIndex.load(index_path, mmap=True)
+
+        results = {
+            "chroma": run_queries(lambda q, k: chroma.similarity_search_by_vector(q, k=k), queries, args.k),
+            "numpy": run_queries(in_memory.similarity_search_by_vector, queries, args.k),
+            "numpy_mmap": run_queries(mapped.similarity_search_by_vector, queries, args.k)
+        }
+
+    print(f"chunks={args.chunks} dim={args.dim} queries={args.queries} k={args.k}")
+    print(f"{'backend':<12}{'qps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<12}{r['qps']:>10.1f}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+QUESTIONS = [
+    "Ký túc xá mở cửa lúc mấy giờ?",
+    "Giờ đóng cửa ký túc xá là mấy giờ?",
+    "Phí ở ký túc xá một tháng bao nhiêu?",
+    "Làm sao để đăng ký phòng ký túc xá?",
+    "Có được nấu ăn trong phòng không?",
+    "Tiền điện nước tính như thế nào?",
+    "Khách đến thăm được ở lại đến mấy giờ?",
+    "Mất thẻ ra vào thì làm thế nào?",
+    "Có chỗ gửi xe máy cho sinh viên không?",
+    "Liên hệ Ban Quản lý KTX bằng cách nào?",
+]
+
+DOCUMENT_TOPICS = [
+    ("Giờ giấc", "Ký túc xá mở cửa từ 5 giờ sáng và đóng cửa lúc 23 giờ. Khách thăm phải rời đi trước 21 giờ."),
+    ("Chi phí", "Phí ở ký túc xá là 500.000 đồng một tháng. Tiền điện nước tính theo công tơ của từng phòng."),
+    ("Đăng ký", "Sinh viên đăng ký phòng qua cổng thông tin, nộp hồ sơ và đóng phí trong vòng 7 ngày."),
+    ("Nội quy", "Không nấu ăn trong phòng. Mất thẻ ra vào cần báo Ban Quản lý KTX để được cấp lại."),
+    ("Tiện ích", "Nhà xe dành cho sinh viên mở cửa cả ngày. Liên hệ Ban Quản lý KTX qua hotline hoặc email."),
+]
+
+
+def build_documents(count):
+    documents = []
+    for i in range(count):
+        title, body = DOCUMENT_TOPICS[i % len(DOCUMENT_TOPICS)]
+        documents.append({
+            "id": f"bench-{i}",
+            "description": f"{title} {i}",
+            "content": " ".join([body] * 8),
+            "created_at": "2024-01-01T00:00:00",
+            "updated_at": "2024-01-01T00:00:00"
+        })
+    return documents
+
+
+def start_backend_stub(documents):
+    payload = json.dumps({
+        "code": 200,
+        "data": {
+            "documents": documents,
+            "prompting": [{"id": "bench", "type": "guest", "content": "Bạn là chatbot hỗ trợ ký túc xá.\n\n"}]
+        }
+    }).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def configure_environment(args, workdir, backend_url):
+    os.environ.update({
+        "BACKEND_API_URL": backend_url,
+        "VECTOR_DB_PATH": os.path.join(workdir, "vector_db"),
+        "LLM_PROVIDER": "fake",
+        "EMBEDDING_PROVIDER": "fake",
+        "FAKE_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "FAKE_LLM_LATENCY_JITTER_MS": str(args.llm_jitter_ms),
+        "FAKE_LLM_TOKENS_PER_SECOND": str(args.llm_tokens_per_second),
+        "FAKE_LLM_RESPONSE_TOKENS": str(args.llm_response_tokens),
+        "MAX_CONNECTIONS": str(args.max_connections),
+        "RATE_LIMIT_MAX_MESSAGES": str(args.rate_limit_messages),
+        "RATE_LIMIT_TIME_WINDOW_SECONDS": str(args.rate_limit_window),
+        "ANSWER_CACHE_ENABLED": "true" if args.answer_cache else "false",
+        "IDLE_TIMEOUT_SECONDS": "3600",
+        "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "unused"),
+    })
+
+
+class LoopLagProbe:
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def reset(self):
+        self.samples = []
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(time.perf_counter() - expected, 0.0))
+
+
+def start_server(app, port):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", ws="websockets"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def wait_until_ready(base_url, timeout):
+    import httpx
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/api/health/ready", timeout=2).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server not ready after {timeout}s")
+
+
+class Stats:
+
+    def __init__(self):
+        self.latencies = []
+        self.first_token = []
+        self.attempted = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.connect_errors = 0
+        self.sent = 0
+        self.answered = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+
+async def run_client(url, stats, args, rng, start_at):
+    from websockets.asyncio.client import connect
+    from websockets.exceptions import ConnectionClosed, InvalidStatus
+
+    await asyncio.sleep(max(start_at - time.perf_counter(), 0.0))
+    stats.attempted += 1
+    try:
+        websocket = await connect(url, open_timeout=args.timeout, max_size=None)
+    except InvalidStatus:
+        stats.rejected += 1
+        return
+    except (OSError, asyncio.TimeoutError):
+        stats.connect_errors += 1
+        return
+
+    stats.accepted += 1
+    interval = 1.0 / args.rate if args.rate > 0 else 0.0
+    try:
+        for _ in range(args.messages):
+            sent_at = time.perf_counter()
+            stats.sent += 1
+            await websocket.send(rng.choice(QUESTIONS))
+
+            first_token_at = None
+            while True:
+                frame = json.loads(await asyncio.wait_for(websocket.recv(), args.timeout))
+                if frame.get("type") == "start":
+                    continue
+                if frame.get("type") == "delta":
+                    first_token_at = first_token_at or time.perf_counter()
+                    continue
+                break
+
+            status = frame.get("status")
+            if status == "rate_limited":
+                stats.rate_limited += 1
+            elif status == "success":
+                stats.answered += 1
+                stats.latencies.append(time.perf_counter() - sent_at)
+                if first_token_at:
+                    stats.first_token.append(first_token_at - sent_at)
+            else:
+                stats.errors += 1
+
+            await asyncio.sleep(max(interval - (time.perf_counter() - sent_at), 0.0))
+    except ConnectionClosed as e:
+        if e.rcvd and e.rcvd.code == 1013:
+            stats.rejected += 1
+        else:
+            stats.errors += 1
+    except asyncio.TimeoutError:
+        stats.errors += 1
+    finally:
+        await websocket.close()
+
+
+def summarize(values):
+    if not values:
+        return {"count": 0}
+    array = np.asarray(values) * 1000
+    return {
+        "count": len(values),
+        "mean_ms": round(float(array.mean()), 2),
+        "p50_ms": round(float(np.percentile(array, 50)), 2),
+        "p95_ms": round(float(np.percentile(array, 95)), 2),
+        "p99_ms": round(float(np.percentile(array, 99)), 2),
+        "max_ms": round(float(array.max()), 2)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_load(args, url):
+    stats = Stats()
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    ramp = args.ramp_up_seconds / args.clients if args.clients else 0.0
+    await asyncio.gather(*[
+        run_client(url, stats, args, random.Random(rng.random()), start + i * ramp)
+        for i in range(args.clients)
+    ])
+    return stats, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end /ws/chat load benchmark (fake LLM + fake embeddings)")
+    parser.add_argument("--clients", type=int, default=120)
+    parser.add_argument("--messages", type=int, default=5, help="messages per client")
+    parser.add_argument("--rate", type=float, default=0.5, help="messages per second per client")
+    parser.add_argument("--ramp-up-seconds", type=float, default=2.0)
+    parser.add_argument("--stream", action="store_true", help="use ?stream=true and record time to first token")
+    parser.add_argument("--max-connections", type=int, default=100)
+    parser.add_argument("--rate-limit-messages", type=int, default=1)
+    parser.add_argument("--rate-limit-window", type=int, default=2)
+    parser.add_argument("--answer-cache", action="store_true", help="keep the answer cache enabled")
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=200)
+    parser.add_argument("--llm-response-tokens", type=int, default=60)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="JSON result path (default: benchmarks/results/ws_load-<timestamp>.json)")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else os.path.join(
+        ROOT, "benchmarks", "results", f"ws_load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    workdir = tempfile.mkdtemp(prefix="ws_load_")
+    backend = start_backend_stub(build_documents(args.documents))
+    configure_environment(args, workdir, f"http://127.0.0.1:{backend.server_port}")
+    os.chdir(workdir)
+
+    import main as app_main
+
+    probe = LoopLagProbe()
+    app_main.app.add_event_handler("startup", probe.start)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server, thread = start_server(app_main.app, args.port)
+    try:
+        wait_until_ready(base_url, args.timeout)
+        probe.reset()
+
+        url = f"ws://127.0.0.1:{args.port}/ws/chat" + ("?stream=true" if args.stream else "")
+        stats, elapsed = asyncio.run(run_load(args, url))
+        lag = list(probe.samples)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        backend.shutdown()
+
+    result = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "config": vars(args),
+        "duration_seconds": round(elapsed, 3),
+        "connections": {
+            "attempted": stats.attempted,
+            "accepted": stats.accepted,
+            "rejected_1013": stats.rejected,
+            "errors": stats.connect_errors
+        },
+        "messages": {
+            "sent": stats.sent,
+            "answered": stats.answered,
+            "rate_limited": stats.rate_limited,
+            "errors": stats.errors
+        },
+        "throughput_answers_per_second": round(stats.answered / elapsed, 2) if elapsed else 0.0,
+        "latency": summarize(stats.latencies),
+        "time_to_first_token": summarize(stats.first_token),
+        "event_loop_lag": summarize(lag)
+    }
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    print(f"Saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
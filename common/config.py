@@ -9,20 +9,62 @@ class Config:
         self.api_base_url = os.getenv('API_BASE_URL', 'http://localhost:8000')
         self.backend_api_url = os.getenv('BACKEND_API_URL', '')
         self.backend_api_key = os.getenv('BACKEND_API_KEY')
+        self.backend_api_timeout_seconds = float(os.getenv('BACKEND_API_TIMEOUT_SECONDS', '30'))
+        self.backend_api_max_retries = int(os.getenv('BACKEND_API_MAX_RETRIES', '3'))
+        self.backend_api_backoff_seconds = float(os.getenv('BACKEND_API_BACKOFF_SECONDS', '0.5'))
+        self.llm_provider = os.getenv('LLM_PROVIDER', 'gemini').lower()
         self.llm_model_name = os.getenv('LLM_MODEL_NAME', 'gemma-3-27b-it')
+        self.google_api_key = os.getenv('GOOGLE_API_KEY')
+        self.llm_base_url = os.getenv('LLM_BASE_URL', '')
+        self.llm_api_key = os.getenv('LLM_API_KEY')
+        self.llm_timeout_seconds = float(os.getenv('LLM_TIMEOUT_SECONDS', '60'))
+        self.fake_llm_latency_ms = float(os.getenv('FAKE_LLM_LATENCY_MS', '800'))
+        self.fake_llm_latency_jitter_ms = float(os.getenv('FAKE_LLM_LATENCY_JITTER_MS', '200'))
+        self.fake_llm_latency_distribution = os.getenv('FAKE_LLM_LATENCY_DISTRIBUTION', 'lognormal').lower()
+        self.fake_llm_tokens_per_second = float(os.getenv('FAKE_LLM_TOKENS_PER_SECOND', '40'))
+        self.fake_llm_response_tokens = int(os.getenv('FAKE_LLM_RESPONSE_TOKENS', '80'))
+        self.fake_llm_seed = int(os.getenv('FAKE_LLM_SEED', '0'))
         self.temperature = float(os.getenv('TEMPERATURE', '0.2'))
         self.max_context_tokens = int(os.getenv('MAX_CONTEXT_TOKENS', '4000'))
         self.max_response_tokens = int(os.getenv('MAX_RESPONSE_TOKENS', '2000'))
         self.vector_db_path = os.getenv('VECTOR_DB_PATH', 'rag_chroma_db')
+        self.vector_db_swap_grace_seconds = int(os.getenv('VECTOR_DB_SWAP_GRACE_SECONDS', '30'))
+        self.vector_backend = os.getenv('VECTOR_BACKEND', 'chroma').lower()
+        self.vector_index_mmap = os.getenv('VECTOR_INDEX_MMAP', 'true').lower() == 'true'
+        self.embedding_provider = os.getenv('EMBEDDING_PROVIDER', 'huggingface').lower()
         self.embedding_model_name = os.getenv('EMBEDDING_MODEL_NAME', 'bkai-foundation-models/vietnamese-bi-encoder')
+        self.embedding_fake_dimension = int(os.getenv('EMBEDDING_FAKE_DIMENSION', '768'))
+        self.embedding_cache_enabled = os.getenv('EMBEDDING_CACHE_ENABLED', 'true').lower() == 'true'
+        self.embedding_cache_retention_seconds = int(os.getenv('EMBEDDING_CACHE_RETENTION_SECONDS', '86400'))
+        self.embedding_batch_window_ms = float(os.getenv('EMBEDDING_BATCH_WINDOW_MS', '5'))
+        self.embedding_batch_max_size = int(os.getenv('EMBEDDING_BATCH_MAX_SIZE', '32'))
         self.chunk_size = int(os.getenv('DB_CHUNK_SIZE', '1000'))
         self.chunk_overlap = int(os.getenv('DB_CHUNK_OVERLAP', '100'))
         self.retrieval_k_chunks = int(os.getenv('RAG_RETRIEVAL_K_CHUNKS', '5'))
+        self.hybrid_enabled = os.getenv('RAG_HYBRID_ENABLED', 'true').lower() == 'true'
+        self.hybrid_candidates = int(os.getenv('RAG_HYBRID_CANDIDATES', '20'))
+        self.rrf_k = int(os.getenv('RAG_RRF_K', '60'))
+        self.retrieval_concurrency = int(os.getenv('RAG_RETRIEVAL_CONCURRENCY', '4'))
+        self.llm_concurrency = int(os.getenv('RAG_LLM_CONCURRENCY', '32'))
+        self.answer_cache_enabled = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+        self.answer_cache_max_entries = int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', '512'))
+        self.answer_cache_ttl_seconds = int(os.getenv('ANSWER_CACHE_TTL_SECONDS', '3600'))
+        self.answer_cache_similarity_threshold = float(os.getenv('ANSWER_CACHE_SIMILARITY_THRESHOLD', '0.92'))
+        self.workers = int(os.getenv('WEB_CONCURRENCY', '1'))
         self.max_messages = int(os.getenv('RATE_LIMIT_MAX_MESSAGES', '1'))
         self.time_window_seconds = int(os.getenv('RATE_LIMIT_TIME_WINDOW_SECONDS', '10'))
+        self.rate_limit_key = os.getenv('RATE_LIMIT_KEY', 'connection').lower()
+        self.rate_limit_user_header = os.getenv('RATE_LIMIT_USER_HEADER', 'x-user-id')
+        self.rate_limit_backend = os.getenv('RATE_LIMIT_BACKEND', 'shared' if self.workers > 1 else 'memory').lower()
+        self.rate_limit_shared_slots = int(os.getenv('RATE_LIMIT_SHARED_SLOTS', '65536'))
+        self.rate_limit_redis_url = os.getenv('RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/0')
         self.max_connections = int(os.getenv('MAX_CONNECTIONS', '100'))
         self.idle_timeout_seconds = int(os.getenv('IDLE_TIMEOUT_SECONDS', '30'))
         self.admin_api_key = os.getenv('ADMIN_API_KEY')
+        self.log_queue_size = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+        self.log_stream_buffer_size = int(os.getenv('LOG_STREAM_BUFFER_SIZE', '2000'))
+        self.log_stream_subscriber_queue_size = int(os.getenv('LOG_STREAM_SUBSCRIBER_QUEUE_SIZE', '1000'))
+        self.log_stream_batch_interval_ms = float(os.getenv('LOG_STREAM_BATCH_INTERVAL_MS', '100'))
         self.status_interval_seconds = int(os.getenv('STATUS_INTERVAL_SECONDS', '60'))
         self.reload_interval_seconds = int(os.getenv('RELOAD_INTERVAL_SECONDS', '200000'))
         self.system_prompt = (
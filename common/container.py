@@ -1,11 +1,20 @@
 from dependency_injector import containers, providers
 from .config import Config
+from .metrics import MetricsRegistry
+from .shared_state import create_connection_counter, create_index_ownership, create_shared_prompt
 from services.logging_service import LoggingService
+from services.log_hub import LogHub
 from services.rag_service import RAGService
+from services.answer_cache import AnswerCache
+from services.context_assembler import ContextAssembler
 from services.database_service import DatabaseService
+from services.embedding_service import EmbeddingService
+from services.embedding_cache import EmbeddingCache
 from services.backend_api_service import BackendAPIService
+from services.index_sync_service import IndexSyncService
 from handler.connection_manager import ConnectionManager
 from middleware.rate_limiter import RateLimiter
+from middleware.rate_limit_store import create_bucket_store
 from handler.app_lifecycle import AppLifecycle
 from handler.chat_handler import ChatHandler
 from handler.log_stream_handler import LogStreamHandler
@@ -24,16 +33,33 @@ class Container(containers.DeclarativeContainer):
             "handler.chat_handler",
             "handler.log_stream_handler",
             "services.rag_service",
+            "services.embedding_service",
             "services.database_service",
             "services.backend_api_service",
+            "services.index_sync_service",
             "routers.http_router",
             "routers.websocket_router",
         ]
     )
 
     config = providers.ThreadSafeSingleton(Config)
+
+    metrics = providers.ThreadSafeSingleton(MetricsRegistry)
+    
+    log_hub = providers.ThreadSafeSingleton(
+        LogHub,
+        buffer_size=config.provided.log_stream_buffer_size,
+        subscriber_queue_size=config.provided.log_stream_subscriber_queue_size,
+        metrics=metrics
+    )
     
-    logging_service = providers.ThreadSafeSingleton(LoggingService)
+    logging_service = providers.ThreadSafeSingleton(
+        LoggingService,
+        queue_size=config.provided.log_queue_size,
+        metrics=metrics,
+        log_hub=log_hub,
+        workers=config.provided.workers
+    )
 
     auth_middleware = providers.ThreadSafeSingleton(
         AuthMiddleware,
@@ -46,28 +72,99 @@ class Container(containers.DeclarativeContainer):
         logging_service=logging_service
     )
 
+    embedding_service = providers.ThreadSafeSingleton(
+        EmbeddingService,
+        config=config,
+        logging_service=logging_service,
+        metrics=metrics
+    )
+
+    embedding_cache = providers.ThreadSafeSingleton(
+        EmbeddingCache,
+        vector_db_path=config.provided.vector_db_path,
+        model_name=embedding_service.provided.model_name,
+        enabled=config.provided.embedding_cache_enabled,
+        retention_seconds=config.provided.embedding_cache_retention_seconds
+    )
+
     db_service = providers.ThreadSafeSingleton(
         DatabaseService,
         config=config,
-        logging_service=logging_service
+        logging_service=logging_service,
+        embedding_service=embedding_service,
+        embedding_cache=embedding_cache
+    )
+
+    answer_cache = providers.ThreadSafeSingleton(
+        AnswerCache,
+        enabled=config.provided.answer_cache_enabled,
+        max_entries=config.provided.answer_cache_max_entries,
+        ttl_seconds=config.provided.answer_cache_ttl_seconds,
+        similarity_threshold=config.provided.answer_cache_similarity_threshold
+    )
+
+    context_assembler = providers.ThreadSafeSingleton(
+        ContextAssembler,
+        max_context_tokens=config.provided.max_context_tokens,
+        chunk_overlap=config.provided.chunk_overlap
     )
 
     rag_service = providers.ThreadSafeSingleton(
         RAGService,
         config=config,
-        logging_service=logging_service
+        logging_service=logging_service,
+        answer_cache=answer_cache,
+        context_assembler=context_assembler,
+        embedding_service=embedding_service,
+        db_service=db_service,
+        metrics=metrics
+    )
+
+    index_ownership = providers.ThreadSafeSingleton(
+        create_index_ownership,
+        config=config
+    )
+
+    shared_prompt = providers.ThreadSafeSingleton(
+        create_shared_prompt,
+        config=config
+    )
+
+    index_sync_service = providers.ThreadSafeSingleton(
+        IndexSyncService,
+        config=config,
+        logging_service=logging_service,
+        db_service=db_service,
+        rag_service=rag_service,
+        index_ownership=index_ownership
+    )
+
+    shared_connections = providers.ThreadSafeSingleton(
+        create_connection_counter,
+        config=config
     )
 
     connection_manager = providers.ThreadSafeSingleton(
         ConnectionManager,
         max_connections=config.provided.max_connections,
-        idle_timeout_seconds=config.provided.idle_timeout_seconds
+        idle_timeout_seconds=config.provided.idle_timeout_seconds,
+        metrics=metrics,
+        shared_counter=shared_connections
+    )
+
+    rate_limit_store = providers.ThreadSafeSingleton(
+        create_bucket_store,
+        config=config,
+        logging_service=logging_service
     )
 
     rate_limiter = providers.ThreadSafeSingleton(
         RateLimiter,
         max_messages=config.provided.max_messages,
-        time_window_seconds=config.provided.time_window_seconds
+        time_window_seconds=config.provided.time_window_seconds,
+        key=config.provided.rate_limit_key,
+        store=rate_limit_store,
+        user_header=config.provided.rate_limit_user_header
     )
 
     chat_handler = providers.ThreadSafeSingleton(
@@ -75,7 +172,8 @@ class Container(containers.DeclarativeContainer):
         rag_service=rag_service,
         logging_service=logging_service,
         rate_limiter=rate_limiter,
-        connection_manager=connection_manager
+        connection_manager=connection_manager,
+        metrics=metrics
     )
 
     app_lifecycle = providers.ThreadSafeSingleton(
@@ -85,13 +183,19 @@ class Container(containers.DeclarativeContainer):
         config=config,
         logging_service=logging_service,
         connection_manager=connection_manager,
-        backend_api_service=backend_api_service
+        backend_api_service=backend_api_service,
+        index_sync_service=index_sync_service,
+        embedding_service=embedding_service,
+        rate_limiter=rate_limiter,
+        index_ownership=index_ownership,
+        shared_prompt=shared_prompt
     )
 
     log_stream_handler = providers.ThreadSafeSingleton(
         LogStreamHandler,
         logging_service=logging_service,
-        config=config
+        config=config,
+        log_hub=log_hub
     )
 
     http_router = providers.ThreadSafeSingleton(
@@ -100,9 +204,13 @@ class Container(containers.DeclarativeContainer):
         config=config,
         rag_service=rag_service,
         database_service=db_service,
+        index_sync_service=index_sync_service,
         backend_api_service=backend_api_service,
         rate_limiter=rate_limiter,
-        auth_middleware=auth_middleware
+        app_lifecycle=app_lifecycle,
+        metrics=metrics,
+        auth_middleware=auth_middleware,
+        shared_prompt=shared_prompt
     )
     
     websocket_router = providers.ThreadSafeSingleton(
@@ -0,0 +1,150 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000)
+
+_FOLD_THRESHOLD = 4096
+
+
+class Counter:
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {self._value}"
+        ]
+
+
+class Gauge:
+    """Gauge sampled from a callback at scrape time, so the hot path never touches it."""
+
+    def __init__(self, name: str, help_text: str, function: Callable[[], float]):
+        self.name = name
+        self.help = help_text
+        self.function = function
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {_format(float(self.function()))}"
+        ]
+
+
+class Histogram:
+    """Observations are appended to a deque (thread-safe, lock-free) and folded into buckets lazily."""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = np.asarray(sorted(buckets), dtype=np.float64)
+        self._pending: deque = deque()
+        self._bucket_counts = np.zeros(len(self.buckets) + 1, dtype=np.int64)
+        self._sum = 0.0
+        self._count = 0
+        self._fold_lock = threading.Lock()
+
+    def observe(self, value: float):
+        self._pending.append(value)
+        if len(self._pending) >= _FOLD_THRESHOLD and self._fold_lock.acquire(blocking=False):
+            try:
+                self._fold()
+            finally:
+                self._fold_lock.release()
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> Dict:
+        with self._fold_lock:
+            self._fold()
+            return {
+                "buckets": self.buckets.tolist(),
+                "counts": np.cumsum(self._bucket_counts).tolist(),
+                "sum": self._sum,
+                "count": self._count
+            }
+
+    def render(self) -> List[str]:
+        snapshot = self.snapshot()
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for bound, count in zip(snapshot["buckets"], snapshot["counts"]):
+            lines.append(f'{self.name}_bucket{{le="{_format(bound)}"}} {count}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {snapshot["count"]}')
+        lines.append(f"{self.name}_sum {_format(snapshot['sum'])}")
+        lines.append(f"{self.name}_count {snapshot['count']}")
+        return lines
+
+    def _fold(self):
+        size = len(self._pending)
+        if not size:
+            return
+        values = np.fromiter((self._pending.popleft() for _ in range(size)), dtype=np.float64, count=size)
+        self._bucket_counts += np.bincount(
+            np.searchsorted(self.buckets, values, side="left"),
+            minlength=len(self.buckets) + 1
+        )
+        self._sum += float(values.sum())
+        self._count += size
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(name, lambda: Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str, function: Callable[[], float]) -> Gauge:
+        gauge = self._register(name, lambda: Gauge(name, help_text, function))
+        gauge.function = function
+        return gauge
+
+    def histogram(self, name: str, help_text: str, buckets: Optional[Sequence[float]] = None) -> Histogram:
+        return self._register(name, lambda: Histogram(name, help_text, buckets or LATENCY_BUCKETS))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, name: str, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
@@ -0,0 +1,139 @@
+import os
+import multiprocessing
+from typing import Optional, Set
+
+
+class SharedConnectionCounter:
+    """Each worker counts into its own slot, so the master can zero a crashed worker's count."""
+
+    def __init__(self, worker_slots: int):
+        self._counts = multiprocessing.RawArray("q", worker_slots)
+        self._lock = multiprocessing.Lock()
+        self._slot: Optional[int] = None
+
+    def bind(self, slot: int):
+        self._slot = slot
+
+    def try_acquire(self, limit: int) -> bool:
+        with self._lock:
+            if sum(self._counts) >= limit:
+                return False
+            self._counts[self._slot or 0] += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            slot = self._slot or 0
+            self._counts[slot] = max(0, self._counts[slot] - 1)
+
+    def reset(self, slot: int):
+        with self._lock:
+            self._counts[slot] = 0
+
+    @property
+    def total(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def slots(self) -> int:
+        return len(self._counts)
+
+
+class IndexOwnership:
+    """Elects the one worker that builds and drops vector collections, and records the collection each worker serves."""
+
+    def __init__(self, lock_path: str, worker_slots: int, name_size: int = 64):
+        self._lock_path = lock_path
+        self._name_size = name_size
+        self._names = multiprocessing.RawArray("c", worker_slots * name_size)
+        self._lock = multiprocessing.Lock()
+        self._lock_file = None
+        self._slot: Optional[int] = None
+
+    def bind(self, slot: int):
+        self._slot = slot
+
+    def try_lead(self) -> bool:
+        if self._lock_file is not None:
+            return True
+        import fcntl
+
+        os.makedirs(os.path.dirname(self._lock_path) or ".", exist_ok=True)
+        lock_file = open(self._lock_path, "a")
+        try:
+            # flock belongs to this open file, so the kernel releases it when the leader dies.
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_file is not None
+
+    def serve(self, collection_name: str):
+        self._write(self._slot or 0, collection_name.encode("utf-8"))
+
+    def reset(self, slot: int):
+        self._write(slot, b"")
+
+    def in_use(self) -> Set[str]:
+        with self._lock:
+            raw = self._names.raw
+        names = (raw[start:start + self._name_size].rstrip(b"\0") for start in range(0, len(raw), self._name_size))
+        return {name.decode("utf-8") for name in names if name}
+
+    def _write(self, slot: int, name: bytes):
+        if len(name) > self._name_size:
+            raise ValueError(f"Collection name longer than {self._name_size} bytes")
+        start = slot * self._name_size
+        with self._lock:
+            self._names[start:start + self._name_size] = name.ljust(self._name_size, b"\0")
+
+
+class SharedPrompt:
+    """The system prompt last set on any worker, in a file every worker re-reads."""
+
+    def __init__(self, path: str):
+        self._path = path
+
+    def publish(self, prompt: str):
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        tmp_path = f"{self._path}.tmp.{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(prompt)
+        os.replace(tmp_path, self._path)
+
+    def load(self) -> Optional[str]:
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def clear(self):
+        try:
+            os.remove(self._path)
+        except FileNotFoundError:
+            pass
+
+
+def create_connection_counter(config) -> Optional[SharedConnectionCounter]:
+    if config.workers <= 1:
+        return None
+    # Spare slots cover replacement workers that start before the old ones have exited.
+    return SharedConnectionCounter(config.workers * 2)
+
+
+def create_index_ownership(config) -> Optional[IndexOwnership]:
+    if config.workers <= 1:
+        return None
+    return IndexOwnership(os.path.join(config.vector_db_path, "index.lock"), config.workers * 2)
+
+
+def create_shared_prompt(config) -> Optional[SharedPrompt]:
+    if config.workers <= 1:
+        return None
+    return SharedPrompt(os.path.join(config.vector_db_path, "system_prompt.txt"))
@@ -0,0 +1,40 @@
+import os
+
+# Multi-worker mode: gunicorn imports the app once in the master (preload_app), then forks
+# WEB_CONCURRENCY uvicorn workers that share the loaded model and the shared-memory state.
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+os.environ["WEB_CONCURRENCY"] = str(workers)
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+bind = f"0.0.0.0:{os.getenv('WEBSITES_PORT', '8000')}"
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+timeout = 120
+graceful_timeout = 30
+
+_assigned_slots = {}
+
+
+def on_starting(server):
+    import main
+    main.preload_for_workers()
+
+
+def pre_fork(server, worker):
+    import main
+    shared_connections = main.container.shared_connections()
+    slots = shared_connections.slots if shared_connections is not None else 1
+    used = set(_assigned_slots.values())
+    worker.shared_slot = next((slot for slot in range(slots) if slot not in used), 0)
+    _assigned_slots[id(worker)] = worker.shared_slot
+
+
+def post_fork(server, worker):
+    import main
+    main.init_worker(worker.shared_slot)
+
+
+def child_exit(server, worker):
+    import main
+    _assigned_slots.pop(id(worker), None)
+    main.release_worker(worker.shared_slot)
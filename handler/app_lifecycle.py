@@ -1,5 +1,9 @@
+import asyncio
+from typing import Dict, List, Optional
 from dependency_injector.wiring import inject, Provide
 
+_INDEX_POLL_SECONDS = 2
+
 class AppLifecycle:
 
     @inject
@@ -11,13 +15,30 @@ class AppLifecycle:
         logging_service = Provide["Container.logging_service"],
         connection_manager = Provide["Container.connection_manager"],
         backend_api_service = Provide["Container.backend_api_service"],
+        index_sync_service = Provide["Container.index_sync_service"],
+        embedding_service = Provide["Container.embedding_service"],
+        rate_limiter = Provide["Container.rate_limiter"],
+        index_ownership = Provide["Container.index_ownership"],
+        shared_prompt = Provide["Container.shared_prompt"],
     ):
         self.rag_service = rag_service
         self.db_service = db_service
         self.config = config
         self.connection_manager = connection_manager
         self.backend_api_service = backend_api_service
+        self.index_sync_service = index_sync_service
+        self.embedding_service = embedding_service
+        self.rate_limiter = rate_limiter
+        self.index_ownership = index_ownership
+        self.shared_prompt = shared_prompt
         self.logger = logging_service.get_logger(__name__)
+
+        self.is_ready = False
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._initial_sync_job_id: Optional[str] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._index_task: Optional[asyncio.Task] = None
+        self._documents: List[Dict] = []
         
         instance_id = id(self)
         self.logger.info(f"AppLifecycle initialized (Singleton ID: {hex(instance_id)})")
@@ -25,37 +46,200 @@ class AppLifecycle:
     async def startup(self):
         self.logger.info("Application Startup")
         
+        self._warmup_task = asyncio.create_task(self._warm_up())
+        self._refresh_task = asyncio.create_task(self._refresh_periodically())
+        if self.index_ownership is not None:
+            self._index_task = asyncio.create_task(self._coordinate_workers())
+        
+        self.logger.info("Startup Complete (models warming up in background)")
+    
+    def readiness(self) -> Dict:
+        sync_job = None
+        if self._initial_sync_job_id:
+            sync_job = self.index_sync_service.get_job(self._initial_sync_job_id)
+
+        return {
+            "ready": self.is_ready,
+            "llm_loaded": self.rag_service.llm is not None,
+            "vector_db_loaded": self.rag_service.vectorstore is not None,
+            "embedding_model_loaded": self.embedding_service.is_loaded,
+            "initial_sync": sync_job["status"] if sync_job else None
+        }
+
+    async def _load_initial_data(self) -> List[Dict]:
         self.logger.info("Fetching initial data from backend API...")
-        initial_data = self.backend_api_service.fetch_initial_data()
+        initial_data = await self.backend_api_service.fetch_initial_data()
         
         if initial_data:
-            documents = initial_data.get('documents', [])
-            if documents:
-                self.db_service.set_documents_from_backend(documents)
-                self.logger.info(f"Loaded {len(documents)} documents from backend")
+            return self._apply_backend_data(initial_data)
+
+        self.logger.warning("No data fetched from backend API, using local data")
+        return []
+
+    def _apply_backend_data(self, data: Dict) -> List[Dict]:
+        documents = data.get('documents', [])
+        if documents:
+            self.db_service.set_documents_from_backend(documents)
+            self._documents = documents
+            self.logger.info(f"Loaded {len(documents)} documents from backend")
+        
+        guest_prompt = data.get('prompting')
+        if guest_prompt:
+            prompt_content = guest_prompt.get('content', '')
             
-            guest_prompt = initial_data.get('prompting')
-            if guest_prompt:
-                prompt_content = guest_prompt.get('content', '')
-                
+            if prompt_content != self.config.system_prompt:
                 try:
                     self.config.system_prompt = prompt_content
+                    if self.shared_prompt is not None and self._owns_index:
+                        self.shared_prompt.publish(prompt_content)
                     self.logger.info("System prompt set from backend data")
                 except ValueError as ve:
                     self.logger.error(f"Invalid system prompt from backend: {ve}")
-        else:
-            self.logger.warning("No data fetched from backend API, using local data")
-        
-        self.logger.info("Loading LLM and Vector Database...")
-        llm, vectorstore = self.rag_service.load_llm_and_db()
         
-        if llm and vectorstore:
-            self.logger.info("LLM and Vector DB loaded successfully")
-        else:
-            self.logger.error("Failed to load LLM or Vector DB")
-        
-        self.logger.info("Startup Complet")
+        return documents
+
+    async def _refresh_periodically(self):
+        interval = self.config.reload_interval_seconds
+        if interval <= 0:
+            return
+
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await self.backend_api_service.refresh():
+                    continue
+
+                self.logger.info("Backend data changed, applying update")
+                documents = self._apply_backend_data(await self.backend_api_service.fetch_initial_data())
+                if not self._owns_index:
+                    continue
+                if documents and not await asyncio.to_thread(self.db_service.index_matches, documents):
+                    job = self.index_sync_service.submit(documents)
+                    self.logger.info(f"Corpus changed, re-indexing in background (job {job['job_id']})")
+            except Exception as e:
+                self.logger.error(f"Backend refresh failed - {e}")
+
+    async def _warm_up(self):
+        try:
+            if self.index_ownership is not None:
+                self.index_ownership.try_lead()
+
+            documents = await self._load_initial_data()
+
+            if self.index_ownership is not None:
+                # The master may have read the pointer long before this worker was forked.
+                await asyncio.to_thread(self._serve_active_collection)
+
+            self.logger.info("Loading LLM and Vector Database...")
+            llm, vectorstore = await asyncio.to_thread(self.rag_service.load_llm_and_db)
+            
+            if llm is not None and vectorstore is not None:
+                self.logger.info("LLM and Vector DB loaded successfully")
+                if self._owns_index:
+                    await asyncio.to_thread(self.index_sync_service.collect_garbage)
+            else:
+                self.logger.error("Failed to load LLM or Vector DB")
+                return
+
+            wait_for_index = False
+            if documents:
+                if not self._owns_index:
+                    wait_for_index = await asyncio.to_thread(self.db_service.chunk_count) == 0
+                    if wait_for_index:
+                        self.logger.info("Waiting for the indexing worker to build the vector database")
+                elif await asyncio.to_thread(self.db_service.index_matches, documents):
+                    self.logger.info("Corpus fingerprint matches persisted index, skipping re-index")
+                else:
+                    wait_for_index = await asyncio.to_thread(self.db_service.chunk_count) == 0
+                    job = self.index_sync_service.submit(documents)
+                    self._initial_sync_job_id = job["job_id"]
+                    self.logger.info(f"Corpus changed since last index, re-indexing in background (job {job['job_id']})")
+
+            self.logger.info("Warming up embedding model...")
+            await asyncio.to_thread(self._warm_up_embeddings)
+
+            while wait_for_index:
+                if self._initial_sync_job_id:
+                    job = self.index_sync_service.get_job(self._initial_sync_job_id)
+                    if not job or job["status"] in ("completed", "failed"):
+                        break
+                elif await asyncio.to_thread(self._serve_active_collection):
+                    await asyncio.to_thread(self._reload_search_index)
+                    break
+                await asyncio.sleep(0.5)
+
+            self.is_ready = True
+            self.logger.info("✓ Chat service ready")
+        except Exception as e:
+            self.logger.error(f"Warmup failed - {e}")
+
+    @property
+    def _owns_index(self) -> bool:
+        return self.index_ownership is None or self.index_ownership.is_leader
+
+    async def _coordinate_workers(self):
+        # One worker holds the index lock and builds/drops collections; the others follow the pointer it writes.
+        # Every worker also adopts a system prompt set on another one.
+        while True:
+            await asyncio.sleep(_INDEX_POLL_SECONDS)
+            if not self._warmup_task.done():
+                continue
+            try:
+                was_leader = self.index_ownership.is_leader
+                if was_leader or self.index_ownership.try_lead():
+                    if not was_leader:
+                        await self._take_over_index()
+                    await asyncio.to_thread(self.index_sync_service.claim_forwarded)
+                elif await asyncio.to_thread(self._serve_active_collection):
+                    await asyncio.to_thread(self._reload_search_index)
+                await asyncio.to_thread(self._follow_system_prompt)
+            except Exception as e:
+                self.logger.error(f"Worker coordination failed - {e}")
+
+    async def _take_over_index(self):
+        self.logger.info("Took over vector database indexing from a stopped worker")
+        if await asyncio.to_thread(self._serve_active_collection):
+            await asyncio.to_thread(self._reload_search_index)
+        await asyncio.to_thread(self.index_sync_service.collect_garbage)
+
+        if self._documents and not await asyncio.to_thread(self.db_service.index_matches, self._documents):
+            job = self.index_sync_service.submit(self._documents)
+            self.logger.info(f"Corpus changed since last index, re-indexing in background (job {job['job_id']})")
+
+    def _follow_system_prompt(self):
+        prompt = self.shared_prompt.load()
+        if prompt is not None and prompt != self.config.system_prompt:
+            self.config.system_prompt = prompt
+            self.logger.info("System prompt updated by another worker")
+
+    def _serve_active_collection(self) -> bool:
+        # Registered before loading, so the indexing worker never drops a collection mid-load.
+        changed = self.db_service.reload_active_collection()
+        self.index_ownership.serve(self.db_service.active_collection)
+        return changed
+
+    def _reload_search_index(self):
+        vectorstore = self.db_service.load_search_index()
+        lexical_index = self.db_service.load_lexical_index() if self.config.hybrid_enabled else None
+        self.rag_service.set_vectorstore(vectorstore, lexical_index)
+        self.logger.info(f"Switched to vector collection {self.db_service.active_collection}")
+
+    def _warm_up_embeddings(self):
+        self.embedding_service.preload()
+        self.embedding_service.get_embeddings().embed_query("ký túc xá")
     
     async def shutdown(self):
         self.logger.info("Application Shutdown")
+        if self._warmup_task and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        if self._index_task and not self._index_task.done():
+            self._index_task.cancel()
+        await self.backend_api_service.aclose()
+        await self.rate_limiter.close()
+        self.connection_manager.stop()
+        self.index_sync_service.shutdown()
+        self.rag_service.shutdown()
+        self.embedding_service.shutdown()
         self.logger.info("Cleanup completed")
\ No newline at end of file
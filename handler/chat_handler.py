@@ -1,6 +1,7 @@
-import asyncio
+import time
 from fastapi import WebSocket, WebSocketDisconnect, status
 from dependency_injector.wiring import inject, Provide
+from services.rag_service import LLMStreamError
 
 class ChatHandler:
     
@@ -10,18 +11,26 @@ class ChatHandler:
         rag_service = Provide["Container.rag_service"],
         logging_service = Provide["Container.logging_service"],
         rate_limiter = Provide["Container.rate_limiter"],
-        connection_manager = Provide["Container.connection_manager"]
+        connection_manager = Provide["Container.connection_manager"],
+        metrics = Provide["Container.metrics"]
     ):
         self.rag = rag_service
         self.rate_limiter = rate_limiter
         self.conn_manager = connection_manager
         self.logger = logging_service.get_logger(__name__)
+
+        self._rejections = metrics.counter("ws_connections_rejected_total", "Chat connections rejected at capacity")
+        self._rate_limited = metrics.counter("ws_rate_limited_total", "Chat messages rejected by the rate limiter")
+        self._response_seconds = metrics.histogram("chat_response_seconds", "Question to final answer latency")
+        metrics.gauge("ws_active_connections", "Open chat connections", lambda: self.conn_manager.active_connections)
+        if self.rate_limiter.client_count is not None:
+            metrics.gauge("rate_limiter_clients", "Clients tracked by the rate limiter", lambda: self.rate_limiter.client_count)
     
     async def handle_chat(self, websocket: WebSocket):
         client_id = id(websocket)
-        timeout_task = None
 
         if not await self.conn_manager.add_connection():
+            self._rejections.inc()
             self.logger.warning("Connection rejected - server capacity reached")
             try:
                 await websocket.close(
@@ -35,12 +44,7 @@ class ChatHandler:
         await websocket.accept()
         self.logger.info(f"Chat: Connection established (ID: {client_id})")
 
-        self.conn_manager.update_activity(client_id)
-        timeout_task = asyncio.create_task(
-            self.conn_manager.check_idle_timeout(websocket, client_id)
-        )
-
-        if not self.rag.llm or not self.rag.vectorstore:
+        if self.rag.llm is None or self.rag.vectorstore is None:
             try:
                 await websocket.send_json({
                     "answer": "Lỗi: Dịch vụ chưa sẵn sàng. Vui lòng thử lại sau.", 
@@ -49,8 +53,11 @@ class ChatHandler:
                 await websocket.close(code=1011)
             except Exception:
                 pass
+            await self.conn_manager.remove_connection(client_id)
             return
 
+        self.conn_manager.watch_idle(websocket, client_id)
+
         try:
             await self._chat_loop(websocket, client_id)
         except WebSocketDisconnect:
@@ -66,12 +73,12 @@ class ChatHandler:
             except Exception:
                 pass
         finally:
-            if timeout_task:
-                timeout_task.cancel()
             await self.conn_manager.remove_connection(client_id)
-            await self.rate_limiter.cleanup_client(client_id)
+            await self.rate_limiter.cleanup_client(websocket)
 
     async def _chat_loop(self, websocket: WebSocket, client_id: int):
+        stream = websocket.query_params.get("stream", "").lower() in ("1", "true")
+
         while True:
             data = await websocket.receive_text()
             self.conn_manager.update_activity(client_id)
@@ -80,11 +87,20 @@ class ChatHandler:
                 continue
 
             if not await self.rate_limiter.check_rate_limit(websocket):
+                self._rate_limited.inc()
                 continue
 
             self.logger.info(f"Chat: Question from {client_id}")
+            started = time.perf_counter()
+
+            if stream:
+                await self._stream_answer(websocket, data)
+                self._response_seconds.observe(time.perf_counter() - started)
+                self.logger.info(f"Chat: Answer streamed to {client_id}")
+                continue
 
-            answer = self.rag.generate_response(data)
+            answer = await self.rag.agenerate_response(data)
+            self._response_seconds.observe(time.perf_counter() - started)
             
             self.logger.info(f"Chat: Answer sent to {client_id}")
             
@@ -92,4 +108,35 @@ class ChatHandler:
                 "question": data, 
                 "answer": answer.strip(), 
                 "status": "success"
-            })
\ No newline at end of file
+            })
+
+    async def _stream_answer(self, websocket: WebSocket, question: str):
+        await websocket.send_json({"type": "start", "question": question})
+
+        parts = []
+        answer_status = "success"
+        deltas = self.rag.astream_response(question)
+        try:
+            while True:
+                try:
+                    delta = await deltas.__anext__()
+                except StopAsyncIteration:
+                    break
+                except LLMStreamError:
+                    answer_status = "error"
+                    break
+                parts.append(delta)
+                await websocket.send_json({"type": "delta", "delta": delta})
+        finally:
+            await deltas.aclose()
+
+        answer = "".join(parts).strip()
+        if not answer:
+            answer = "Lỗi kết nối AI." if answer_status == "error" else "Không có phản hồi từ AI."
+
+        await websocket.send_json({
+            "type": "end",
+            "question": question,
+            "answer": answer,
+            "status": answer_status
+        })
@@ -1,62 +1,127 @@
 import time
+import heapq
 import asyncio
-from typing import Dict
+from typing import Dict, List, Optional, Set, Tuple
 from fastapi import WebSocket, status
+from common.metrics import MetricsRegistry
+from common.shared_state import SharedConnectionCounter
 
 
 class ConnectionManager:
-    def __init__(self, max_connections: int = 100, idle_timeout_seconds: int = 30):
+    """Activity only moves a deadline in `_deadlines`; the reaper re-pushes heap entries whose deadline moved."""
+    
+    def __init__(self, max_connections: int = 100, idle_timeout_seconds: int = 30, metrics: MetricsRegistry = None,
+                 shared_counter: Optional[SharedConnectionCounter] = None):
         self.max_connections = max_connections
         self.idle_timeout_seconds = idle_timeout_seconds
+        self._idle_timeouts = (metrics or MetricsRegistry()).counter(
+            "ws_idle_timeouts_total", "Chat connections closed for inactivity"
+        )
         self._active_count = 0
-        self._last_activity: Dict[int, float] = {}
+        # With several workers, capacity is checked against every worker's connections.
+        self._shared = shared_counter
+        self._deadlines: Dict[int, float] = {}
+        self._sockets: Dict[int, WebSocket] = {}
+        self._heap: List[Tuple[float, int]] = []
+        self._wakeup = asyncio.Event()
+        self._reaper: Optional[asyncio.Task] = None
+        self._closing: Set[asyncio.Task] = set()
         self._lock = asyncio.Lock()
     
     async def can_accept_connection(self) -> bool:
         async with self._lock:
-            return self._active_count < self.max_connections
+            return self.active_connections < self.max_connections
     
     async def add_connection(self) -> bool:
         async with self._lock:
-            if self._active_count >= self.max_connections:
+            if self._shared is not None:
+                if not self._shared.try_acquire(self.max_connections):
+                    return False
+            elif self._active_count >= self.max_connections:
                 return False
             self._active_count += 1
             return True
     
     async def remove_connection(self, client_id: int):
         async with self._lock:
+            if self._shared is not None:
+                self._shared.release()
             self._active_count = max(0, self._active_count - 1)
-            self._last_activity.pop(client_id, None)
+            self._deadlines.pop(client_id, None)
+            self._sockets.pop(client_id, None)
+    
+    def watch_idle(self, websocket: WebSocket, client_id: int):
+        """Starts the idle timeout for an accepted socket; it is closed after idle_timeout_seconds without activity."""
+        deadline = time.monotonic() + self.idle_timeout_seconds
+        self._sockets[client_id] = websocket
+        self._deadlines[client_id] = deadline
+        heapq.heappush(self._heap, (deadline, client_id))
+        
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_idle())
+        self._wakeup.set()
     
     def update_activity(self, client_id: int):
-        self._last_activity[client_id] = time.time()
+        if client_id in self._deadlines:
+            self._deadlines[client_id] = time.monotonic() + self.idle_timeout_seconds
     
-    async def check_idle_timeout(self, websocket: WebSocket, client_id: int):
+    def stop(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for task in self._closing:
+            task.cancel()
+        self._closing.clear()
+    
+    async def _reap_idle(self):
         while True:
-            await asyncio.sleep(10)
-
-            if websocket.client_state != status.WS_CONNECTED:
-                break
-
-            last_activity_time = self._last_activity.get(client_id, time.time())
-            current_time = time.time()
-
-            if (current_time - last_activity_time) > self.idle_timeout_seconds:
-                print(f"Conn: {client_id} idle, disconnecting")
-                try:
-                    await websocket.send_json({
-                        "answer": f"Kết nối đã bị ngắt do không hoạt động trong {self.idle_timeout_seconds} giây.", 
-                        "status": "timeout"
-                    })
-                    await websocket.close(code=status.WS_1000_NORMAL_CLOSURE)
-                except Exception:
-                    pass
-                break
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            
+            deadline, client_id = self._heap[0]
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                # Every deadline is now + the same timeout, so a new connection never
+                # expires before the current head; sleeping until the head is enough.
+                await asyncio.sleep(delay)
+                continue
+            
+            heapq.heappop(self._heap)
+            current = self._deadlines.get(client_id)
+            if current is None:
+                continue  # removed since this entry was pushed
+            if current > deadline:
+                heapq.heappush(self._heap, (current, client_id))
+                continue
+            
+            websocket = self._sockets.pop(client_id, None)
+            self._deadlines.pop(client_id, None)
+            if websocket is not None and websocket.client_state == status.WS_CONNECTED:
+                # Closing runs on its own so one slow socket does not delay the next timeout.
+                task = asyncio.create_task(self._close_idle(websocket, client_id))
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+    
+    async def _close_idle(self, websocket: WebSocket, client_id: int):
+        print(f"Conn: {client_id} idle, disconnecting")
+        self._idle_timeouts.inc()
+        try:
+            await websocket.send_json({
+                "answer": f"Kết nối đã bị ngắt do không hoạt động trong {self.idle_timeout_seconds} giây.", 
+                "status": "timeout"
+            })
+            await websocket.close(code=status.WS_1000_NORMAL_CLOSURE)
+        except Exception:
+            pass
     
     @property
     def active_connections(self) -> int:
+        if self._shared is not None:
+            return self._shared.total
         return self._active_count
     
     @property
     def activity_count(self) -> int:
-        return len(self._last_activity)
+        return len(self._deadlines)
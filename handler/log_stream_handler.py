@@ -1,8 +1,10 @@
+import time
 import asyncio
-from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import List, Optional
 from fastapi import WebSocket, WebSocketDisconnect
 from dependency_injector.wiring import inject, Provide
+from services.log_hub import LogSubscription
 
 
 class LogStreamHandler:
@@ -10,12 +12,16 @@ class LogStreamHandler:
     @inject
     def __init__(self, 
         logging_service = Provide["Container.logging_service"],
-        config = Provide["Container.config"]
+        config = Provide["Container.config"],
+        log_hub = Provide["Container.log_hub"]
     ):
         self.logger = logging_service.get_logger(__name__)
         self.logging_service = logging_service
         self.config = config
+        self.log_hub = log_hub
         self.logs_dir = Path("logs")
+        self.max_batch_lines = 200
+        self.batch_interval = config.log_stream_batch_interval_ms / 1000
     
     async def stream_logs(self, websocket: WebSocket):
         await websocket.accept()
@@ -40,22 +46,14 @@ class LogStreamHandler:
                 "message": f"Streaming logs from last {minutes} minutes"
             })
             
-            vietnam_tz = timezone(timedelta(hours=7))
-            start_time = datetime.now(vietnam_tz) - timedelta(minutes=minutes)
-            
-            log_path = self.logging_service.get_latest_log_path()
-            
-            if not log_path.exists():
-                await websocket.send_json({
-                    "error": "Not Found",
-                    "message": "No log files found"
-                })
-                await websocket.close()
-                return
-            
-            await self._send_historical_logs(websocket, log_path, start_time)
-            
-            await self._tail_log_file(websocket, log_path)
+            start_time = time.time() - minutes * 60
+            subscription, buffered = self.log_hub.subscribe(since=start_time)
+            subscribed_at = time.time()
+            try:
+                await self._send_historical_logs(websocket, start_time, subscribed_at, buffered)
+                await self._stream_live_logs(websocket, subscription)
+            finally:
+                self.log_hub.unsubscribe(subscription)
             
         except WebSocketDisconnect:
             self.logger.info("WebSocket client disconnected")
@@ -70,32 +68,21 @@ class LogStreamHandler:
                 pass
             await websocket.close()
     
-    async def _send_historical_logs(self, websocket: WebSocket, log_path: Path, start_time: datetime):
+    async def _send_historical_logs(self, websocket: WebSocket, start_time: float, end_time: float,
+                                    buffered: Optional[List[str]]):
         try:
-            with open(log_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.startswith('['):
-                        try:
-                            timestamp_str = line[1:20]  
-                            log_time = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-                            vietnam_tz = timezone(timedelta(hours=7))
-                            log_time = log_time.replace(tzinfo=vietnam_tz)
-                            
-                            if log_time >= start_time:
-                                await websocket.send_json({
-                                    "type": "log",
-                                    "content": line.rstrip('\n')
-                                })
-                        except ValueError:
-                            await websocket.send_json({
-                                "type": "log",
-                                "content": line.rstrip('\n')
-                            })
-                    else:
-                        await websocket.send_json({
-                            "type": "log",
-                            "content": line.rstrip('\n')
-                        })
+            lines = buffered
+            if lines is None:
+                # The ring buffer does not reach back to start_time; read the window from disk,
+                # up to the moment the live subscription started.
+                lines = await asyncio.to_thread(
+                    lambda: list(self.logging_service.iter_log_lines(start=start_time, end=end_time))
+                )
+            for offset in range(0, len(lines), self.max_batch_lines):
+                await websocket.send_json({
+                    "type": "logs",
+                    "lines": lines[offset:offset + self.max_batch_lines]
+                })
             
             await websocket.send_json({
                 "type": "marker",
@@ -106,29 +93,37 @@ class LogStreamHandler:
             self.logger.error(f"Error sending historical logs: {str(e)}")
             raise
     
-    async def _tail_log_file(self, websocket: WebSocket, log_path: Path):
+    async def _stream_live_logs(self, websocket: WebSocket, subscription: LogSubscription):
+        # Nothing is expected from the client after auth; receiving only detects disconnects
+        # while the hub is quiet.
+        disconnect = asyncio.create_task(self._wait_for_disconnect(websocket))
         try:
-            with open(log_path, 'r', encoding='utf-8') as f:
-                f.seek(0, 2)
+            while not disconnect.done():
+                batch = asyncio.create_task(subscription.next_batch(self.max_batch_lines, self.batch_interval))
+                await asyncio.wait({batch, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+                if not batch.done():
+                    batch.cancel()
+                    break
                 
-                while True:
-                    line = f.readline()
-                    
-                    if line:
-                        await websocket.send_json({
-                            "type": "log",
-                            "content": line.rstrip('\n')
-                        })
-                    else:
-                        await asyncio.sleep(0.5)
-                        
-                        if not log_path.exists():
-                            await websocket.send_json({
-                                "type": "info",
-                                "message": "Log file rotated, reconnect to continue"
-                            })
-                            break
-        
-        except Exception as e:
-            self.logger.error(f"Error tailing log file: {str(e)}")
-            raise
+                lines, dropped = batch.result()
+                if dropped:
+                    self.log_hub.record_dropped(dropped)
+                    await websocket.send_json({
+                        "type": "dropped",
+                        "count": dropped,
+                        "message": f"Viewer fell behind, {dropped} log lines skipped"
+                    })
+                if lines:
+                    await websocket.send_json({
+                        "type": "logs",
+                        "lines": lines
+                    })
+        finally:
+            disconnect.cancel()
+    
+    @staticmethod
+    async def _wait_for_disconnect(websocket: WebSocket):
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
@@ -1,3 +1,6 @@
+import gc
+import os
+import sys
 from fastapi import FastAPI
 from common.container import Container
 from middleware.cors import setup_cors
@@ -22,7 +25,7 @@ app.include_router(websocket_router_handler.router)
 async def startup():
     logger.info("Application starting...")
     await app_lifecycle.startup()
-    logger.info("✓ Application ready")
+    logger.info("✓ Application started")
 
 
 @app.on_event("shutdown")
@@ -30,3 +33,40 @@ async def shutdown():
     logger.info("Application shutting down...")
     await app_lifecycle.shutdown()
     logger.info("✓ Application stopped")
+    logging_service.shutdown()
+
+
+def preload_for_workers():
+    """Runs in the gunicorn master before workers are forked."""
+    shared_prompt = container.shared_prompt()
+    if shared_prompt is not None:
+        # Like a single process, a restart starts again from the backend prompt.
+        shared_prompt.clear()
+    logger.info("Preloading embedding model before forking workers...")
+    container.embedding_service().preload()
+    gc.freeze()
+
+
+def init_worker(slot: int):
+    """Runs in each freshly forked worker with the shared-state slot the master assigned it."""
+    logging_service.after_fork()
+    shared_connections = container.shared_connections()
+    if shared_connections is not None:
+        shared_connections.bind(slot)
+    index_ownership = container.index_ownership()
+    if index_ownership is not None:
+        index_ownership.bind(slot)
+    
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // container.config().workers))
+
+
+def release_worker(slot: int):
+    """Runs in the master when a worker exits; clears the connections and collection its slot still held."""
+    shared_connections = container.shared_connections()
+    if shared_connections is not None:
+        shared_connections.reset(slot)
+    index_ownership = container.index_ownership()
+    if index_ownership is not None:
+        index_ownership.reset(slot)
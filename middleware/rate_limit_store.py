@@ -0,0 +1,284 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+import multiprocessing
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class BucketStore(ABC):
+    """`take` returns (allowed, seconds until a token is available); refill-and-spend must be atomic per key."""
+
+    @abstractmethod
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> Tuple[bool, float]:
+        ...
+
+    @abstractmethod
+    async def forget(self, key: str):
+        ...
+
+    @property
+    def size(self) -> Optional[int]:
+        """Number of tracked keys, or None when the store cannot count them cheaply."""
+        return None
+
+    async def close(self):
+        pass
+
+
+class InMemoryBucketStore(BucketStore):
+    """Buckets idle long enough to be full again equal missing ones, so periodic sweeps drop them."""
+
+    def __init__(self, shards: int = 16, sweep_every: int = 1024):
+        self._shards: List[Dict[str, List[float]]] = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._operations = [0] * shards
+        self._sweep_every = sweep_every
+
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> Tuple[bool, float]:
+        return self.take_nowait(key, capacity, refill_per_second)
+
+    def take_nowait(self, key: str, capacity: float, refill_per_second: float) -> Tuple[bool, float]:
+        index = hash(key) % len(self._shards)
+        shard = self._shards[index]
+        now = time.monotonic()
+
+        with self._locks[index]:
+            self._operations[index] += 1
+            if self._operations[index] % self._sweep_every == 0:
+                self._sweep(shard, now, capacity / refill_per_second)
+
+            bucket = shard.get(key)
+            if bucket is None:
+                bucket = shard[key] = [capacity, now]
+            else:
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * refill_per_second)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True, 0.0
+            return False, (1 - bucket[0]) / refill_per_second
+
+    async def forget(self, key: str):
+        index = hash(key) % len(self._shards)
+        with self._locks[index]:
+            self._shards[index].pop(key, None)
+
+    @property
+    def size(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    @staticmethod
+    def _sweep(shard: Dict[str, List[float]], now: float, full_after: float):
+        for key in [key for key, (_, updated) in shard.items() if now - updated >= full_after]:
+            del shard[key]
+
+
+class SharedMemoryBucketStore(BucketStore):
+    """When a key's probe window has no free slot, the least recently updated bucket is evicted."""
+
+    _PROBES = 8
+    _SPINS = 64
+
+    def __init__(self, slots: int = 65536, stripes: int = 64, logger: Optional[logging.Logger] = None):
+        stripes = max(1, min(stripes, slots // self._PROBES))
+        self._stripe_size = slots // stripes
+        total = self._stripe_size * stripes
+        self._keys = multiprocessing.RawArray("Q", total)
+        self._tokens = multiprocessing.RawArray("d", total)
+        self._updated = multiprocessing.RawArray("d", total)
+        self._occupied = multiprocessing.RawArray("q", stripes)
+        self._locks = [multiprocessing.Lock() for _ in range(stripes)]
+        self._owners = multiprocessing.RawArray("q", stripes)
+        self._recovery_lock = multiprocessing.Lock()
+        self.logger = logger or logging.getLogger(__name__)
+
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> Tuple[bool, float]:
+        return self.take_nowait(key, capacity, refill_per_second)
+
+    def take_nowait(self, key: str, capacity: float, refill_per_second: float) -> Tuple[bool, float]:
+        hashed, stripe, base, start = self._locate(key)
+        # CLOCK_MONOTONIC is system-wide on Linux, so every worker reads the same clock.
+        now = time.monotonic()
+
+        if not self._acquire(stripe):
+            return True, 0.0
+        try:
+            slot = self._find_slot(base, start, hashed, now, capacity / refill_per_second)
+            if self._keys[slot] == hashed:
+                tokens = min(capacity, self._tokens[slot] + (now - self._updated[slot]) * refill_per_second)
+            else:
+                if self._keys[slot] == 0:
+                    self._occupied[stripe] += 1
+                self._keys[slot] = hashed
+                tokens = capacity
+            self._updated[slot] = now
+
+            if tokens >= 1:
+                self._tokens[slot] = tokens - 1
+                return True, 0.0
+            self._tokens[slot] = tokens
+            return False, (1 - tokens) / refill_per_second
+        finally:
+            self._release(stripe)
+
+    async def forget(self, key: str):
+        hashed, stripe, base, start = self._locate(key)
+        if not self._acquire(stripe):
+            return
+        try:
+            for probe in range(min(self._PROBES, self._stripe_size)):
+                slot = base + (start + probe) % self._stripe_size
+                if self._keys[slot] == hashed:
+                    self._keys[slot] = 0
+                    self._occupied[stripe] -= 1
+                    return
+        finally:
+            self._release(stripe)
+
+    @property
+    def size(self) -> int:
+        return sum(self._occupied)
+
+    def _acquire(self, stripe: int) -> bool:
+        # Never blocks the event loop: a call that cannot get the stripe is allowed through.
+        for _ in range(self._SPINS):
+            if self._locks[stripe].acquire(False):
+                self._owners[stripe] = os.getpid()
+                return True
+        self._recover_orphaned(stripe)
+        return False
+
+    def _release(self, stripe: int):
+        self._owners[stripe] = 0
+        self._locks[stripe].release()
+
+    def _recover_orphaned(self, stripe: int):
+        owner = self._owners[stripe]
+        if not owner or _process_alive(owner) or not self._recovery_lock.acquire(False):
+            return
+        try:
+            if self._owners[stripe] != owner:
+                return
+            self._owners[stripe] = 0
+            self._locks[stripe].release()
+        finally:
+            self._recovery_lock.release()
+        self.logger.error(f"RateLimit: released shared stripe {stripe} held by exited worker {owner}")
+
+    def _locate(self, key: str) -> Tuple[int, int, int, int]:
+        # Slot 0 marks an empty key, so the low bit is forced on.
+        hashed = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") | 1
+        stripe = hashed % len(self._locks)
+        start = (hashed // len(self._locks)) % self._stripe_size
+        return hashed, stripe, stripe * self._stripe_size, start
+
+    def _find_slot(self, base: int, start: int, hashed: int, now: float, full_after: float) -> int:
+        free = None
+        oldest = None
+        for probe in range(min(self._PROBES, self._stripe_size)):
+            slot = base + (start + probe) % self._stripe_size
+            key = self._keys[slot]
+            if key == hashed:
+                return slot
+            if free is None and (key == 0 or now - self._updated[slot] >= full_after):
+                free = slot
+            if oldest is None or self._updated[slot] < self._updated[oldest]:
+                oldest = slot
+        return free if free is not None else oldest
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# KEYS[1] = bucket; ARGV = capacity, refill per second. Uses the server clock so every
+# worker and host agrees on elapsed time.
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1])
+local updated = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+else
+    tokens = math.min(capacity, tokens + (now - updated) * rate)
+end
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+if allowed == 1 then
+    return {1, '0'}
+end
+return {0, tostring((1 - tokens) / rate)}
+"""
+
+
+class RedisBucketStore(BucketStore):
+    """Any client exposing redis.asyncio's `register_script` works, e.g. fakeredis in tests."""
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "ratelimit:", client: Any = None):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise ValueError("RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+            client = redis.from_url(url)
+        self._client = client
+        self._prefix = prefix
+        self._take = client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> Tuple[bool, float]:
+        allowed, retry_after = await self._take(keys=[self._prefix + key], args=[capacity, refill_per_second])
+        return bool(int(allowed)), float(retry_after)
+
+    async def forget(self, key: str):
+        await self._client.delete(self._prefix + key)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def _memory(config, logging_service) -> BucketStore:
+    return InMemoryBucketStore()
+
+
+def _shared(config, logging_service) -> BucketStore:
+    logger = logging_service.get_logger(__name__) if logging_service is not None else None
+    return SharedMemoryBucketStore(slots=config.rate_limit_shared_slots, logger=logger)
+
+
+def _redis(config, logging_service) -> BucketStore:
+    return RedisBucketStore(url=config.rate_limit_redis_url)
+
+
+RATE_LIMIT_BACKENDS: Dict[str, Callable[[Any, Any], BucketStore]] = {
+    "memory": _memory,
+    "shared": _shared,
+    "redis": _redis,
+}
+
+
+def create_bucket_store(config, logging_service = None) -> BucketStore:
+    backend = RATE_LIMIT_BACKENDS.get(config.rate_limit_backend)
+    if backend is None:
+        raise ValueError(
+            f"Unknown RATE_LIMIT_BACKEND '{config.rate_limit_backend}' (expected one of {', '.join(RATE_LIMIT_BACKENDS)})"
+        )
+    return backend(config, logging_service)
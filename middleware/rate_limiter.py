@@ -1,48 +1,63 @@
-import time
-import asyncio
-from typing import Dict, List
+import os
+from typing import Optional
 from fastapi import WebSocket
+from middleware.rate_limit_store import BucketStore, InMemoryBucketStore
+
+RATE_LIMIT_KEYS = ("connection", "ip", "user")
 
 
 class RateLimiter:
-    
-    def __init__(self, max_messages: int = 1, time_window_seconds: int = 10):
+    """`user_header` must be set by a trusted proxy; without it user keys fall back to the IP."""
+
+    def __init__(self, max_messages: int = 1, time_window_seconds: int = 10, key: str = "connection",
+                 store: Optional[BucketStore] = None, user_header: str = "x-user-id"):
+        if key not in RATE_LIMIT_KEYS:
+            raise ValueError(f"Unknown RATE_LIMIT_KEY '{key}' (expected one of {', '.join(RATE_LIMIT_KEYS)})")
         self.max_messages = max_messages
         self.time_window_seconds = time_window_seconds
-        self._store: Dict[int, List[float]] = {}
-        self._lock = asyncio.Lock()
-    
+        self.key = key
+        self.user_header = user_header.lower()
+        self._refill_per_second = max_messages / time_window_seconds
+        self._store = store or InMemoryBucketStore()
+
     async def check_rate_limit(self, websocket: WebSocket) -> bool:
-        client_id = id(websocket)
-        current_time = time.time()
-
-        async with self._lock:
-            timestamps = [
-                t for t in self._store.get(client_id, []) 
-                if t > current_time - self.time_window_seconds
-            ]
-
-            if len(timestamps) >= self.max_messages:
-                time_to_wait = (timestamps[0] + self.time_window_seconds) - current_time
-                print(f"RateLimit: {client_id} exceeded, wait {time_to_wait:.1f}s")
-
-                try:
-                    await websocket.send_json({
-                        "answer": "Bạn gửi quá nhanh, vui lòng chờ một chút trước khi gửi câu hỏi tiếp theo.",
-                        "status": "rate_limited"
-                    })
-                except Exception:
-                    pass
-                return False
-
-            timestamps.append(current_time)
-            self._store[client_id] = timestamps
+        key = self.client_key(websocket)
+        allowed, time_to_wait = await self._store.take(key, self.max_messages, self._refill_per_second)
+        if allowed:
             return True
-    
-    async def cleanup_client(self, client_id: int):
-        async with self._lock:
-            self._store.pop(client_id, None)
-    
+
+        print(f"RateLimit: {key} exceeded, wait {time_to_wait:.1f}s")
+        try:
+            await websocket.send_json({
+                "answer": "Bạn gửi quá nhanh, vui lòng chờ một chút trước khi gửi câu hỏi tiếp theo.",
+                "status": "rate_limited"
+            })
+        except Exception:
+            pass
+        return False
+
+    def client_key(self, websocket: WebSocket) -> str:
+        if self.key == "user":
+            user_id = websocket.headers.get(self.user_header)
+            if user_id:
+                return f"user:{user_id}"
+        if self.key in ("ip", "user") and websocket.client:
+            return f"ip:{websocket.client.host}"
+        return self._connection_key(websocket)
+
+    async def cleanup_client(self, websocket: WebSocket):
+        # IP and user buckets are shared with the client's other connections and expire on their own.
+        if self.key == "connection":
+            await self._store.forget(self._connection_key(websocket))
+
+    @staticmethod
+    def _connection_key(websocket: WebSocket) -> str:
+        # id() is only unique within a process; the pid keeps workers sharing a store apart.
+        return f"conn:{os.getpid()}:{id(websocket)}"
+
+    async def close(self):
+        await self._store.close()
+
     @property
-    def client_count(self) -> int:
-        return len(self._store)
+    def client_count(self) -> Optional[int]:
+        return self._store.size
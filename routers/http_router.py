@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from dependency_injector.wiring import inject, Provide
 from datetime import datetime
 import asyncio
+from services.log_archive import EXTENSIONS, MEDIA_TYPES
+from services.log_index import VIETNAM_TZ
 
 
 class PromptUpdateRequest(BaseModel):
@@ -43,28 +45,42 @@ class HTTPRouter:
                 config = Provide["Container.config"],
                 rag_service = Provide["Container.rag_service"],
                 database_service = Provide["Container.db_service"],
+                index_sync_service = Provide["Container.index_sync_service"],
                 backend_api_service = Provide["Container.backend_api_service"],
                 rate_limiter = Provide["Container.rate_limiter"],
-                auth_middleware = Provide["Container.auth_middleware"]  
+                app_lifecycle = Provide["Container.app_lifecycle"],
+                metrics = Provide["Container.metrics"],
+                auth_middleware = Provide["Container.auth_middleware"],
+                shared_prompt = Provide["Container.shared_prompt"]
             ):
         self.logging_service = logging_service
         self.config = config
         self.rag_service = rag_service
         self.database_service = database_service
+        self.index_sync_service = index_sync_service
         self.backend_api_service = backend_api_service
         self.rate_limiter = rate_limiter
+        self.app_lifecycle = app_lifecycle
+        self.metrics = metrics
         self.logger = logging_service.get_logger(__name__)
         self.auth_middleware = auth_middleware
+        self.shared_prompt = shared_prompt
         self.router = APIRouter(prefix="/api", tags=["HTTP"])
         self._register_routes()
     
     def _register_routes(self):
         self.router.add_api_route("/health", self.health_check, methods=["GET"])
+        self.router.add_api_route("/health/live", self.liveness_check, methods=["GET"])
+        self.router.add_api_route("/health/ready", self.readiness_check, methods=["GET"])
         
         self.router.add_api_route("/admin/prompt", self.get_prompt, methods=["GET"], dependencies=[Depends(self.auth_middleware.require_admin_auth)])
         self.router.add_api_route("/admin/prompt", self.update_prompt, methods=["PUT"], dependencies=[Depends(self.auth_middleware.require_admin_auth)])
         self.router.add_api_route("/admin/prompts/sync", self.sync_prompts_from_backend, methods=["POST"], dependencies=[Depends(self.auth_middleware.require_admin_auth)])
-        self.router.add_api_route("/admin/database/sync", self.sync_vector_database, methods=["POST"], dependencies=[Depends(self.auth_middleware.require_admin_auth)])
+        self.router.add_api_route("/admin/database/sync", self.sync_vector_database, methods=["POST"], status_code=202, dependencies=[Depends(self.auth_middleware.require_admin_auth)])
+        self.router.add_api_route("/admin/database/sync/{job_id}", self.get_sync_job, methods=["GET"], dependencies=[Depends(self.auth_middleware.require_admin_auth)])
+        self.router.add_api_route("/metrics", self.get_metrics, methods=["GET"], dependencies=[Depends(self.auth_middleware.require_admin_auth)])
+        self.router.add_api_route("/admin/cache/stats", self.get_cache_stats, methods=["GET"], dependencies=[Depends(self.auth_middleware.require_admin_auth)])
+        self.router.add_api_route("/admin/logs/tail", self.tail_logs, methods=["GET"], dependencies=[Depends(self.auth_middleware.require_admin_auth)])
         self.router.add_api_route("/admin/logs/download", self.download_logs, methods=["POST"], dependencies=[Depends(self.auth_middleware.require_admin_auth)])
         
         self.logger.info("HTTP router created with all endpoints")
@@ -75,11 +91,30 @@ class HTTPRouter:
             "service": "PTIT Dorm Chatbot"
         }
 
+    async def liveness_check(self):
+        return {"status": "alive"}
+    
+    async def readiness_check(self):
+        readiness = self.app_lifecycle.readiness()
+        if not readiness["ready"]:
+            return JSONResponse(status_code=503, content={"status": "starting", **readiness})
+        return {"status": "ready", **readiness}
+    
+    async def get_metrics(self):
+        return PlainTextResponse(self.metrics.render(), media_type="text/plain; version=0.0.4")
+
+    async def get_cache_stats(self):
+        return {
+            **self.rag_service.answer_cache.stats(),
+            "coalescing": self.rag_service.coalescing_stats(),
+            "embedding_cache": await asyncio.to_thread(self.database_service.embedding_cache.stats)
+        }
+
     async def get_prompt(self):
         return {"system_prompt": self.config.system_prompt}
     
     async def update_prompt(self, request: PromptUpdateRequest):
-        self.config.system_prompt = request.system_prompt
+        await self._set_system_prompt(request.system_prompt)
         return {
             "status": "success",
             "message": "System prompt updated successfully",
@@ -105,7 +140,7 @@ class HTTPRouter:
                     status_code=400,
                     detail="Guest prompt content is empty"
                 )
-            self.config.system_prompt = guest_prompt.content
+            await self._set_system_prompt(guest_prompt.content)
             
             self.logger.info(f"System prompt synced: type={guest_prompt.type}, id={guest_prompt.id}")
             
@@ -128,6 +163,12 @@ class HTTPRouter:
                 detail=f"Error syncing prompts: {str(e)}"
             )
     
+    async def _set_system_prompt(self, prompt: str):
+        self.config.system_prompt = prompt
+        if self.shared_prompt is not None:
+            # Other workers pick it up within a few seconds.
+            await asyncio.to_thread(self.shared_prompt.publish, prompt)
+    
     async def sync_vector_database(self, request: DatabaseSyncRequest):
         try:
             if not request.documents:
@@ -150,22 +191,14 @@ class HTTPRouter:
             self.database_service.set_documents_from_backend(documents_data)
             self.logger.info(f"Received {len(documents_data)} documents from backend")
             
-            vectorstore = self.database_service.setup_database()
+            job = self.index_sync_service.submit(documents_data)
             
-            if vectorstore:
-                self.rag_service.vectorstore = vectorstore
-                self.logger.info(f"Vector database rebuilt with {len(documents_data)} documents")
-                
-                return {
-                    "status": "success",
-                    "message": "Vector database synced successfully",
-                    "documents_count": len(documents_data)
-                }
-            else:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Failed to rebuild vector database"
-                )
+            return {
+                "status": "accepted",
+                "message": "Vector database sync started",
+                "job_id": job["job_id"],
+                "documents_count": len(documents_data)
+            }
                 
         except HTTPException:
             raise
@@ -176,25 +209,39 @@ class HTTPRouter:
                 detail=f"Error syncing database: {str(e)}"
             )
     
-    async def download_logs(self, download_all: bool = Query(False, description="Download all logs as zip")):
+    async def get_sync_job(self, job_id: str):
+        job = self.index_sync_service.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Sync job not found")
+        return job
+    
+    async def tail_logs(
+        self,
+        before: Optional[str] = Query(None, description="Cursor from a previous page; omit for the newest lines"),
+        limit: int = Query(100, ge=1, le=5000)
+    ):
         try:
-            if download_all:
-                archive_path = self.logging_service.create_logs_archive("logs_download.zip")
-                
-                response = FileResponse(
-                    path=str(archive_path),
-                    filename=f"logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
-                    media_type="application/zip"
-                )
-                
-                async def cleanup():
-                    await asyncio.sleep(3)
-                    self.logging_service.cleanup_temp_archive(archive_path)
-                
-                asyncio.create_task(cleanup())
-                
-                return response
-            else:
+            return await asyncio.to_thread(self.logging_service.read_lines_before, before, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            self.logger.error(f"Error reading logs: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error reading logs: {str(e)}"
+            )
+    
+    async def download_logs(
+        self,
+        download_all: bool = Query(False, description="Download all logs as an archive"),
+        start: Optional[datetime] = Query(None, description="Only records at or after this time (ISO 8601, default UTC+7)"),
+        end: Optional[datetime] = Query(None, description="Only records at or before this time (ISO 8601, default UTC+7)"),
+        format: Optional[str] = Query(None, description="zip (default for download_all), gzip or zstd")
+    ):
+        try:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            
+            if not download_all and start is None and end is None and format is None:
                 log_path = self.logging_service.get_latest_log_path()
                 
                 if not log_path.exists():
@@ -202,14 +249,40 @@ class HTTPRouter:
                 
                 return FileResponse(
                     path=str(log_path),
-                    filename=f"app_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log",
+                    filename=f"app_{timestamp}.log",
                     media_type="text/plain"
                 )
+            
+            archive_format = (format or "zip").lower()
+            chunks = await asyncio.to_thread(
+                self.logging_service.stream_logs_archive,
+                download_all,
+                self._epoch(start),
+                self._epoch(end),
+                archive_format
+            )
+            
+            # A sync iterator is advanced in the threadpool, one chunk per read by the client.
+            return StreamingResponse(
+                chunks,
+                media_type=MEDIA_TYPES[archive_format],
+                headers={"Content-Disposition": f'attachment; filename="logs_{timestamp}.{EXTENSIONS[archive_format]}"'}
+            )
         except HTTPException:
             raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             self.logger.error(f"Error downloading logs: {str(e)}")
             raise HTTPException(
                 status_code=500,
                 detail=f"Error downloading logs: {str(e)}"
             )
+    
+    @staticmethod
+    def _epoch(value: Optional[datetime]) -> Optional[float]:
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=VIETNAM_TZ)
+        return value.timestamp()
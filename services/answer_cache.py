@@ -0,0 +1,186 @@
+import re
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+import numpy as np
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCT_RE = re.compile(r"[\s?!.,;:…]+$")
+
+
+def normalize_question(question: str) -> str:
+    text = unicodedata.normalize("NFC", question).lower()
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    return _TRAILING_PUNCT_RE.sub("", text)
+
+
+class _CacheEntry:
+    __slots__ = ("answer", "slot", "expires_at")
+
+    def __init__(self, answer: str, slot: Optional[int], expires_at: float):
+        self.answer = answer
+        self.slot = slot
+        self.expires_at = expires_at
+
+
+class AnswerCache:
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_entries: int = 512,
+        ttl_seconds: int = 3600,
+        similarity_threshold: float = 0.92
+    ):
+        self.enabled = enabled and max_entries > 0
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._slot_keys: Dict[int, str] = {}
+        self._free_slots: List[int] = list(range(max_entries - 1, -1, -1))
+        self._vectors: Optional[np.ndarray] = None
+        self._version: Hashable = None
+        self._lock = threading.Lock()
+
+        self._exact_hits = 0
+        self._semantic_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get_exact(self, normalized: str, version: Hashable) -> Optional[str]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(normalized)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                self._remove(normalized)
+                return None
+
+            self._entries.move_to_end(normalized)
+            self._exact_hits += 1
+            return entry.answer
+
+    def get_similar(self, vector: List[float], version: Hashable) -> Optional[str]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            self._check_version(version)
+            if self._vectors is None or not self._slot_keys:
+                self._misses += 1
+                return None
+
+            query = self._normalize_vector(vector)
+            if query is None or query.shape[0] != self._vectors.shape[1]:
+                self._misses += 1
+                return None
+
+            scores = self._vectors @ query
+            slot = int(np.argmax(scores))
+            key = self._slot_keys.get(slot)
+            if key is None or scores[slot] < self.similarity_threshold:
+                self._misses += 1
+                return None
+
+            entry = self._entries[key]
+            if entry.expires_at < time.monotonic():
+                self._remove(key)
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._semantic_hits += 1
+            return entry.answer
+
+    def put(self, normalized: str, vector: Optional[List[float]], answer: str, version: Hashable):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if version != self._version:
+                return  # computed against an index or prompt that has since been replaced
+            if normalized in self._entries:
+                self._remove(normalized)
+
+            while len(self._entries) >= self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+            slot = None
+            query = self._normalize_vector(vector) if vector is not None else None
+            if query is not None:
+                if self._vectors is None:
+                    self._vectors = np.zeros((self.max_entries, query.shape[0]), dtype=np.float32)
+                if query.shape[0] == self._vectors.shape[1]:
+                    slot = self._free_slots.pop()
+                    self._vectors[slot] = query
+                    self._slot_keys[slot] = normalized
+
+            self._entries[normalized] = _CacheEntry(
+                answer=answer,
+                slot=slot,
+                expires_at=time.monotonic() + self.ttl_seconds
+            )
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._exact_hits + self._semantic_hits + self._misses
+            hits = self._exact_hits + self._semantic_hits
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "similarity_threshold": self.similarity_threshold,
+                "exact_hits": self._exact_hits,
+                "semantic_hits": self._semantic_hits,
+                "misses": self._misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations
+            }
+
+    def _check_version(self, version: Hashable):
+        if version != self._version:
+            if self._entries:
+                self._invalidations += 1
+            self._clear()
+            self._version = version
+
+    def _clear(self):
+        self._entries.clear()
+        self._slot_keys.clear()
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+        if self._vectors is not None:
+            self._vectors.fill(0.0)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None or entry.slot is None:
+            return
+        self._vectors[entry.slot] = 0.0
+        self._slot_keys.pop(entry.slot, None)
+        self._free_slots.append(entry.slot)
+
+    @staticmethod
+    def _normalize_vector(vector: List[float]) -> Optional[np.ndarray]:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        if norm == 0.0:
+            return None
+        return array / norm
@@ -1,77 +1,172 @@
-import requests
+import json
+import asyncio
+import random
+import hashlib
+import httpx
 from typing import Optional, Dict, List
 from dependency_injector.wiring import inject, Provide
 
+INITIALIZE_PATH = "/api/chatbot/initialize"
+_RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
 class BackendAPIService:
-    
+
     @inject
-    def __init__(self, 
+    def __init__(self,
                  config = Provide["Container.config"],
                  logging_service = Provide["Container.logging_service"]):
         self.config = config
         self.logger = logging_service.get_logger(__name__)
         self.backend_url = self.config.backend_api_url
         self.api_key = self.config.backend_api_key
-        
-    def fetch_initial_data(self) -> Optional[Dict]:
+        self.timeout_seconds = self.config.backend_api_timeout_seconds
+        self.max_retries = self.config.backend_api_max_retries
+        self.backoff_seconds = self.config.backend_api_backoff_seconds
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._payload: Optional[Dict] = None
+        self._payload_hash: Optional[str] = None
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+
+    @property
+    def payload_hash(self) -> Optional[str]:
+        return self._payload_hash
+
+    async def fetch_initial_data(self) -> Optional[Dict]:
+        if self._payload is None:
+            await self.refresh()
+        return self._payload
+
+    async def refresh(self) -> bool:
+        """Conditionally re-fetch the backend payload. Returns True when it changed."""
         if not self.backend_url:
             self.logger.warning("Backend API URL not configured")
-            return None
-            
-        try:
-            headers = {}
-            if self.api_key:
-                headers['API-key'] = f'{self.api_key}'
-                
-            self.logger.info(f"Fetching initial data from {self.backend_url}/api/chatbot/initialize")
-            
-            response = requests.get(
-                f"{self.backend_url}/api/chatbot/initialize",
-                headers=headers,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get('code') == 200 and 'data' in data:
-                    result = data['data']
-                    
-                    prompting_list = result.get('prompting', [])
-                    guest_prompt = None
-                    
-                    for prompt in prompting_list:
-                        if prompt.get('type') == 'guest':
-                            guest_prompt = prompt
-                            break
-                    
-                    self.logger.info(f"Fetched {len(result.get('documents', []))} documents and guest prompt")
-                    
-                    return {
-                        "documents": result.get('documents', []),
-                        "prompting": guest_prompt
-                    }
-                else:
-                    self.logger.error(f"Invalid response format from backend: {data}")
-                    return None
-            else:
-                self.logger.error(f"Backend API returned status {response.status_code}")
+            return False
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            try:
+                return await self._refresh()
+            except Exception as e:
+                self.logger.error(f"Error fetching initial data: {str(e)}")
+                return False
+
+    async def _refresh(self) -> bool:
+        response = await self._request()
+        if response is None:
+            return False
+
+        if response.status_code == 304:
+            self.logger.info("Backend data not modified")
+            return False
+
+        if response.status_code != 200:
+            self.logger.error(f"Backend API returned status {response.status_code}")
+            return False
+
+        payload = self._parse(response)
+        if payload is None:
+            return False
+
+        self._etag = response.headers.get('ETag')
+        self._last_modified = response.headers.get('Last-Modified')
+
+        payload_hash = hashlib.sha256(
+            json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        if payload_hash == self._payload_hash:
+            self.logger.info("Backend data unchanged")
+            return False
+
+        self._payload = payload
+        self._payload_hash = payload_hash
+        return True
+
+    async def fetch_documents(self) -> Optional[List[Dict]]:
+        data = await self.fetch_initial_data()
+        return data.get('documents') if data else None
+
+    async def fetch_guest_prompt(self) -> Optional[Dict]:
+        data = await self.fetch_initial_data()
+        return data.get('prompting') if data else None
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self) -> Optional[httpx.Response]:
+        headers = {}
+        if self.api_key:
+            headers['API-key'] = f'{self.api_key}'
+        if self._payload is not None:
+            if self._etag:
+                headers['If-None-Match'] = self._etag
+            if self._last_modified:
+                headers['If-Modified-Since'] = self._last_modified
+
+        url = f"{self.backend_url}{INITIALIZE_PATH}"
+        for attempt in range(self.max_retries + 1):
+            error = None
+            try:
+                self.logger.info(f"Fetching initial data from {url}")
+                response = await self._get_client().get(url, headers=headers)
+                if response.status_code not in _RETRY_STATUS_CODES:
+                    return response
+                error = f"status {response.status_code}"
+            except httpx.TimeoutException:
+                error = "request timeout"
+            except httpx.TransportError as e:
+                error = f"cannot connect ({e.__class__.__name__})"
+
+            if attempt == self.max_retries:
+                self.logger.error(f"Backend API request failed after {attempt + 1} attempts - {error}")
                 return None
-                
-        except requests.exceptions.Timeout:
-            self.logger.error("Backend API request timeout")
+
+            delay = random.uniform(0, self.backoff_seconds * (2 ** attempt))
+            self.logger.warning(f"Backend API {error}, retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def _parse(self, response: httpx.Response) -> Optional[Dict]:
+        try:
+            data = response.json()
+        except ValueError as e:
+            self.logger.error(f"Invalid JSON from backend: {str(e)}")
             return None
-        except requests.exceptions.ConnectionError:
-            self.logger.error("Cannot connect to backend API")
+
+        if not isinstance(data, dict) or data.get('code') != 200 or not isinstance(data.get('data'), dict):
+            self.logger.error(f"Invalid response format from backend: {data}")
             return None
-        except Exception as e:
-            self.logger.error(f"Error fetching initial data: {str(e)}")
+
+        result = data['data']
+        documents = result.get('documents') or []
+        prompts = result.get('prompting') or []
+        if not isinstance(documents, list) or not isinstance(prompts, list):
+            self.logger.error(f"Invalid response format from backend: {data}")
             return None
-    
-    def fetch_documents(self) -> Optional[List[Dict]]:
-        data = self.fetch_initial_data()
-        return data.get('documents') if data else None
-    
-    def fetch_guest_prompt(self) -> Optional[Dict]:
-        data = self.fetch_initial_data()
-        return data.get('prompting') if data else None
+
+        guest_prompt = None
+        for prompt in prompts:
+            if isinstance(prompt, dict) and prompt.get('type') == 'guest':
+                guest_prompt = prompt
+                break
+
+        self.logger.info(f"Fetched {len(documents)} documents and guest prompt")
+
+        return {
+            "documents": [document for document in documents if isinstance(document, dict)],
+            "prompting": guest_prompt
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout_seconds, connect=min(self.timeout_seconds, 5.0)),
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=2)
+            )
+        return self._client
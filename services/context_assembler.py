@@ -0,0 +1,130 @@
+import re
+import math
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Tuple
+from langchain_core.documents import Document
+from langchain_core.prompts import PromptTemplate
+
+RAG_TEMPLATE = (
+    "{system_prompt}"
+    "NGỮ CẢNH:\n"
+    "--- Bối cảnh dữ liệu hiện tại (Ngày {current_date}) ---\n"
+    "{context}\n"
+    "--- KẾT THÚC NGỮ CẢNH ---\n\n"
+    "Câu hỏi của sinh viên:\n"
+    "{question}\n\n"
+    "Hãy đưa ra câu trả lời trực tiếp:"
+)
+
+CHUNK_SEPARATOR = "\n\n"
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+_CHARS_PER_TOKEN = 4
+_MIN_OVERLAP_CHARS = 16
+_MIN_TRIM_TOKENS = 32
+
+
+def count_tokens(text: str) -> int:
+    """Approximate SentencePiece token count: one per punctuation mark, ~4 chars per word piece."""
+    return sum(max(1, math.ceil(len(piece) / _CHARS_PER_TOKEN)) for piece in _PIECE_RE.findall(text))
+
+
+class AssembledPrompt(NamedTuple):
+    text: str
+    prompt_tokens: int
+    context_tokens: int
+    chunks_used: int
+    chunks_trimmed: int
+    chunks_dropped: int
+
+
+class ContextAssembler:
+
+    def __init__(self, max_context_tokens: int = 4000, chunk_overlap: int = 100):
+        self.max_context_tokens = max_context_tokens
+        self.chunk_overlap = chunk_overlap
+        self.template = PromptTemplate(
+            template=RAG_TEMPLATE,
+            input_variables=["context", "question", "system_prompt", "current_date"]
+        )
+        self._template_tokens = count_tokens(RAG_TEMPLATE.format(
+            system_prompt="", current_date="00/00/0000", context="", question=""
+        ))
+
+    def assemble(self, question: str, system_prompt: str, retrieved_docs: List[Document]) -> AssembledPrompt:
+        fixed_tokens = self._template_tokens + count_tokens(system_prompt) + count_tokens(question)
+        remaining = self.max_context_tokens - fixed_tokens
+
+        parts: List[str] = []
+        context_tokens = 0
+        trimmed = 0
+        included: Dict[str, List[str]] = {}
+
+        for doc in retrieved_docs:
+            separator_tokens = count_tokens(CHUNK_SEPARATOR) if parts else 0
+            text = self._dedupe(doc, included)
+            if not text:
+                continue
+            text = " ".join(text.split())
+
+            tokens = count_tokens(text)
+            if tokens + separator_tokens > remaining:
+                if remaining - separator_tokens >= _MIN_TRIM_TOKENS:
+                    text, tokens = self._truncate(text, remaining - separator_tokens)
+                    trimmed += 1
+                else:
+                    break
+
+            parts.append(text)
+            included.setdefault(doc.metadata.get("id", ""), []).append(doc.page_content)
+            context_tokens += tokens + separator_tokens
+            remaining -= tokens + separator_tokens
+            if trimmed:
+                break
+
+        text = self.template.format(
+            context=CHUNK_SEPARATOR.join(parts),
+            current_date=datetime.now().strftime("%d/%m/%Y"),
+            system_prompt=system_prompt,
+            question=question
+        )
+        return AssembledPrompt(
+            text=text,
+            prompt_tokens=fixed_tokens + context_tokens,
+            context_tokens=context_tokens,
+            chunks_used=len(parts),
+            chunks_trimmed=trimmed,
+            chunks_dropped=len(retrieved_docs) - len(parts)
+        )
+
+    def _dedupe(self, doc: Document, included: Dict[str, List[str]]) -> str:
+        text = doc.page_content
+        for other in included.get(doc.metadata.get("id", ""), []):
+            if text in other:
+                return ""
+            head = self._overlap(other, text)
+            if head:
+                text = text[head:]
+            tail = self._overlap(text, other)
+            if tail:
+                text = text[:-tail]
+        return text.strip()
+
+    def _overlap(self, before: str, after: str) -> int:
+        """Length of the longest suffix of `before` that is also a prefix of `after`."""
+        limit = min(self.chunk_overlap, len(before), len(after))
+        for size in range(limit, _MIN_OVERLAP_CHARS - 1, -1):
+            if before.endswith(after[:size]):
+                return size
+        return 0
+
+    @staticmethod
+    def _truncate(text: str, budget: int) -> Tuple[str, int]:
+        words = text.split(" ")
+        kept, tokens = [], 0
+        for word in words:
+            cost = count_tokens(word)
+            if tokens + cost > budget:
+                break
+            kept.append(word)
+            tokens += cost
+        return " ".join(kept), tokens
@@ -1,80 +1,349 @@
 import os
-from typing import Optional, List, Dict, TYPE_CHECKING
+import json
+import time
+import shutil
+import hashlib
+import threading
+from typing import Callable, Optional, List, Dict, Union, TYPE_CHECKING
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
 from dependency_injector.wiring import inject, Provide
+from services.vector_index import NumpyVectorIndex
+from services.lexical_index import LexicalIndex
 
 if TYPE_CHECKING:
     from common.container import Container
 
+COLLECTION_PREFIX = "ptit_dorm_"
+ACTIVE_POINTER_FILE = "active_collection"
+INDEX_META_FILE = "index_meta.json"
+NUMPY_INDEX_DIR = "numpy_index"
+_BATCH_SIZE = 32
+
 class DatabaseService:
     @inject
     def __init__(self, 
         config = Provide["Container.config_service"],
-        logging_service = Provide["Container.logging_service"]
+        logging_service = Provide["Container.logging_service"],
+        embedding_service = Provide["Container.embedding_service"],
+        embedding_cache = Provide["Container.embedding_cache"]
     ):
         self.config = config
         self.vector_db_path = self.config.vector_db_path
-        self.embedding_model_name = self.config.embedding_model_name
+        self.embedding_service = embedding_service
+        self.embedding_cache = embedding_cache
         self.chunk_size = self.config.chunk_size
         self.chunk_overlap = self.config.chunk_overlap
         self._documents_cache = None
         self.logger = logging_service.get_logger(__name__)
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            separators=["\n\n", "\n", ". ", " ", ""]
+        )
+        self._build_lock = threading.Lock()
+        self.active_collection = self._read_active_collection()
     
     def set_documents_from_backend(self, documents: List[Dict]):
         self._documents_cache = documents
         self.logger.info(f"DB: Cached {len(documents)} documents from backend")
     
-    def get_documents(self) -> List[Document]:
-        if not self._documents_cache:
+    def get_documents(self, documents_data: Optional[List[Dict]] = None) -> List[Document]:
+        if documents_data is None:
+            documents_data = self._documents_cache
+        if not documents_data:
             return []
         
         documents = []
-        for doc_data in self._documents_cache:
+        for doc_data in documents_data:
+            content = doc_data.get('content', '') or ''
+            description = doc_data.get('description', '') or ''
             doc = Document(
-                page_content=doc_data.get('content', ''),
+                page_content=content,
                 metadata={
-                    "id": doc_data.get('id', ''),
-                    "description": doc_data.get('description', ''),
-                    "source": "backend"
+                    "id": str(doc_data.get('id', '')),
+                    "description": description,
+                    "source": "backend",
+                    "updated_at": doc_data.get('updated_at') or '',
+                    "content_hash": self.content_hash(description, content)
                 }
             )
             documents.append(doc)
         return documents
 
-    def setup_database(self) -> Optional[Chroma]:
+    @staticmethod
+    def content_hash(description: str, content: str) -> str:
+        return hashlib.sha256(f"{description}\n{content}".encode("utf-8")).hexdigest()
+
+    def corpus_fingerprint(self, documents: List[Document]) -> str:
+        payload = {
+            "embedding_model": self.embedding_service.model_name,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "documents": sorted(
+                [doc.metadata["id"], doc.metadata["content_hash"], doc.metadata["updated_at"]]
+                for doc in documents
+            )
+        }
+        return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def index_matches(self, documents_data: Optional[List[Dict]] = None) -> bool:
+        documents = self.get_documents(documents_data)
+        meta = self._read_index_meta()
+        return (
+            bool(documents)
+            and meta.get("collection") == self.active_collection
+            and meta.get("fingerprint") == self.corpus_fingerprint(documents)
+        )
+
+    def chunk_count(self) -> int:
+        return self.load_vectorstore()._collection.count()
+
+    def load_vectorstore(self, collection_name: Optional[str] = None) -> Chroma:
+        return Chroma(
+            collection_name=collection_name or self.active_collection,
+            persist_directory=self.vector_db_path,
+            embedding_function=self.embedding_service.get_embeddings()
+        )
+
+    def load_search_index(self, collection_name: Optional[str] = None) -> Union[Chroma, NumpyVectorIndex]:
+        collection_name = collection_name or self.active_collection
+        if self.config.vector_backend != "numpy":
+            return self.load_vectorstore(collection_name)
+
+        index_path = self._numpy_index_path(collection_name)
+        if not NumpyVectorIndex.exists(index_path):
+            self._export_numpy_index(self.load_vectorstore(collection_name), collection_name)
+        return NumpyVectorIndex.load(index_path, mmap=self.config.vector_index_mmap)
+
+    def load_lexical_index(self, collection_name: Optional[str] = None) -> LexicalIndex:
+        vectorstore = self.load_vectorstore(collection_name)
+        stored = vectorstore.get(include=["documents", "metadatas"])
+        index = LexicalIndex.build(stored["ids"], stored["documents"], stored["metadatas"])
+        self.logger.info(f"DB: Built BM25 index over {len(index)} chunks")
+        return index
+
+    def setup_database(
+        self,
+        documents_data: Optional[List[Dict]] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Optional[Union[Chroma, NumpyVectorIndex]]:
         self.logger.info("DB: Processing documents from backend cache")
-        documents = self.get_documents()
+        documents = self.get_documents(documents_data)
         
         if not documents:
             self.logger.warning("DB: No documents available")
             return None
 
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
-        chunks = text_splitter.split_documents(documents)
+        with self._build_lock:
+            active = self.load_vectorstore()
+            indexed = self._get_indexed_documents(active)
+            incoming = {doc.metadata["id"]: doc for doc in documents}
 
-        embeddings = HuggingFaceEmbeddings(model_name=self.embedding_model_name)
-        
-        if os.path.exists(self.vector_db_path):
-            vectorstore = Chroma(
-                persist_directory=self.vector_db_path,
-                embedding_function=embeddings
+            reused_ids = []
+            metadata_updates = {}
+            changed_docs = []
+
+            for doc_id, doc in incoming.items():
+                entry = indexed.get(doc_id)
+                if entry is None or entry["content_hash"] != doc.metadata["content_hash"]:
+                    changed_docs.append(doc)
+                    continue
+                reused_ids.extend(entry["chunk_ids"])
+                if entry["updated_at"] != doc.metadata["updated_at"]:
+                    for chunk_id, metadata in zip(entry["chunk_ids"], entry["metadatas"]):
+                        metadata_updates[chunk_id] = {**metadata, "updated_at": doc.metadata["updated_at"]}
+
+            removed_count = len([doc_id for doc_id in indexed if doc_id not in incoming])
+            if not changed_docs and not removed_count and not metadata_updates:
+                self.logger.info(f"DB: Index already up to date ({len(incoming)} documents)")
+                self._write_index_meta(self.corpus_fingerprint(documents), len(incoming))
+                return self.load_search_index()
+
+            chunks = []
+            chunk_ids = []
+            for doc in changed_docs:
+                for index, chunk in enumerate(self.text_splitter.split_documents([doc])):
+                    chunks.append(chunk)
+                    chunk_ids.append(f"{doc.metadata['id']}:{index}")
+
+            collection_name = f"{COLLECTION_PREFIX}{int(time.time() * 1000)}"
+            target = self.load_vectorstore(collection_name)
+            try:
+                copied_texts = self._copy_chunks(active, target, reused_ids, metadata_updates)
+                self._embed_chunks(target, chunks, chunk_ids, progress)
+                if self.config.vector_backend == "numpy":
+                    self._export_numpy_index(target, collection_name)
+            except Exception:
+                self.drop_collection(collection_name)
+                raise
+
+            self._write_active_collection(collection_name)
+            self._write_index_meta(self.corpus_fingerprint(documents), len(incoming))
+
+            referenced_texts = copied_texts + [chunk.page_content for chunk in chunks]
+            evicted = self.embedding_cache.compact(self.embedding_cache.key(text) for text in referenced_texts)
+            if evicted:
+                self.logger.info(f"DB: Evicted {evicted} unreferenced cached embeddings")
+
+            self.logger.info(
+                f"DB: Built {collection_name} - {len(changed_docs)} documents re-embedded ({len(chunks)} chunks), "
+                f"{removed_count} removed, {len(incoming) - len(changed_docs)} unchanged"
             )
-            existing_ids = vectorstore.get()['ids']
-            if len(existing_ids) > 0:
-                vectorstore.delete(ids=existing_ids)
-            vectorstore.add_documents(documents=chunks)
-        else:
-            vectorstore = Chroma.from_documents(
-                documents=chunks,
-                embedding=embeddings,
-                persist_directory=self.vector_db_path
+            return self.load_search_index(collection_name)
+
+    def drop_collection(self, collection_name: str):
+        if collection_name == self.active_collection:
+            return
+        try:
+            shutil.rmtree(self._numpy_index_path(collection_name), ignore_errors=True)
+            self.load_vectorstore(collection_name).delete_collection()
+            self.logger.info(f"DB: Dropped collection {collection_name}")
+        except Exception as e:
+            self.logger.warning(f"DB: Failed to drop collection {collection_name} - {e}")
+
+    def inactive_collections(self) -> List[str]:
+        try:
+            collections = self.load_vectorstore()._client.list_collections()
+        except Exception as e:
+            self.logger.warning(f"DB: Failed to list collections - {e}")
+            return []
+
+        names = [getattr(collection, "name", collection) for collection in collections]
+        return [name for name in names if name.startswith(COLLECTION_PREFIX) and name != self.active_collection]
+
+    def reload_active_collection(self) -> bool:
+        """Picks up a pointer swap written by another worker; returns True when it changed."""
+        name = self._read_active_collection()
+        if name == self.active_collection:
+            return False
+        self.active_collection = name
+        return True
+
+    def _copy_chunks(self, source: Chroma, target: Chroma, chunk_ids: List[str], metadata_updates: Dict[str, Dict]) -> List[str]:
+        copied_texts = []
+        for start in range(0, len(chunk_ids), _BATCH_SIZE * 8):
+            stored = source.get(
+                ids=chunk_ids[start:start + _BATCH_SIZE * 8],
+                include=["embeddings", "documents", "metadatas"]
+            )
+            metadatas = [
+                metadata_updates.get(chunk_id, metadata)
+                for chunk_id, metadata in zip(stored["ids"], stored["metadatas"])
+            ]
+            target._collection.add(
+                ids=stored["ids"],
+                embeddings=stored["embeddings"],
+                documents=stored["documents"],
+                metadatas=metadatas
+            )
+            copied_texts.extend(stored["documents"])
+        return copied_texts
+
+    def _embed_chunks(
+        self,
+        target: Chroma,
+        chunks: List[Document],
+        chunk_ids: List[str],
+        progress: Optional[Callable[[int, int], None]]
+    ):
+        embeddings = self.embedding_service.get_embeddings()
+        total = len(chunks)
+        if progress:
+            progress(0, total)
+
+        cache_hits = 0
+        for start in range(0, total, _BATCH_SIZE):
+            batch = chunks[start:start + _BATCH_SIZE]
+            texts = [chunk.page_content for chunk in batch]
+            keys = [self.embedding_cache.key(text) for text in texts]
+
+            vectors = self.embedding_cache.get_many(keys)
+            cache_hits += sum(1 for key in keys if key in vectors)
+            missing = [(key, text) for key, text in zip(keys, texts) if key not in vectors]
+            if missing:
+                encoded = embeddings.embed_documents([text for _, text in missing])
+                fresh = {key: vector for (key, _), vector in zip(missing, encoded)}
+                self.embedding_cache.put_many(fresh)
+                vectors.update(fresh)
+
+            target._collection.add(
+                ids=chunk_ids[start:start + _BATCH_SIZE],
+                embeddings=[vectors[key] for key in keys],
+                documents=texts,
+                metadatas=[chunk.metadata for chunk in batch]
             )
-            
-        return vectorstore
\ No newline at end of file
+            if progress:
+                progress(min(start + _BATCH_SIZE, total), total)
+
+        if total:
+            self.logger.info(f"DB: Embedded {total - cache_hits} chunks, {cache_hits} served from embedding cache")
+
+    def _export_numpy_index(self, vectorstore: Chroma, collection_name: str):
+        index = NumpyVectorIndex.from_chroma(vectorstore)
+        index.save(self._numpy_index_path(collection_name))
+        self.logger.info(f"DB: Exported {len(index)} chunks to NumPy index for {collection_name}")
+
+    def _numpy_index_path(self, collection_name: str) -> str:
+        return os.path.join(self.vector_db_path, NUMPY_INDEX_DIR, collection_name)
+
+    def _read_active_collection(self) -> str:
+        pointer_path = os.path.join(self.vector_db_path, ACTIVE_POINTER_FILE)
+        try:
+            with open(pointer_path, 'r', encoding='utf-8') as f:
+                name = f.read().strip()
+                if name:
+                    return name
+        except FileNotFoundError:
+            pass
+        return Chroma._LANGCHAIN_DEFAULT_COLLECTION_NAME
+
+    def _write_active_collection(self, collection_name: str):
+        self._write_atomic(ACTIVE_POINTER_FILE, collection_name)
+        self.active_collection = collection_name
+
+    def _read_index_meta(self) -> Dict:
+        try:
+            with open(os.path.join(self.vector_db_path, INDEX_META_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_index_meta(self, fingerprint: str, documents_count: int):
+        meta = {
+            "collection": self.active_collection,
+            "fingerprint": fingerprint,
+            "embedding_model": self.embedding_service.model_name,
+            "documents_count": documents_count,
+            "built_at": time.time()
+        }
+        self._write_atomic(INDEX_META_FILE, json.dumps(meta, ensure_ascii=False))
+
+    def _write_atomic(self, filename: str, content: str):
+        os.makedirs(self.vector_db_path, exist_ok=True)
+        path = os.path.join(self.vector_db_path, filename)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _get_indexed_documents(self, vectorstore: Chroma) -> Dict[str, Dict]:
+        indexed: Dict[str, Dict] = {}
+        stored = vectorstore.get(include=["metadatas"])
+
+        for chunk_id, metadata in zip(stored["ids"], stored["metadatas"]):
+            metadata = metadata or {}
+            doc_id = str(metadata.get("id", ""))
+            entry = indexed.setdefault(doc_id, {
+                "content_hash": metadata.get("content_hash"),
+                "updated_at": metadata.get("updated_at", ""),
+                "chunk_ids": [],
+                "metadatas": []
+            })
+            if entry["content_hash"] != metadata.get("content_hash"):
+                entry["content_hash"] = None
+            entry["chunk_ids"].append(chunk_id)
+            entry["metadatas"].append(metadata)
+
+        return indexed
@@ -0,0 +1,121 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Iterable, List
+import numpy as np
+
+CACHE_FILE = "embedding_cache.sqlite3"
+_SQLITE_BATCH_SIZE = 500
+
+
+class EmbeddingCache:
+
+    def __init__(
+        self,
+        vector_db_path: str,
+        model_name: str,
+        enabled: bool = True,
+        retention_seconds: int = 86400
+    ):
+        self.enabled = enabled
+        self.model_name = model_name
+        self.retention_seconds = retention_seconds
+        self.path = os.path.join(vector_db_path, CACHE_FILE)
+
+        self._conn = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not self.enabled or not keys:
+            return {}
+
+        found: Dict[str, List[float]] = {}
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            for batch in self._batches(list(dict.fromkeys(keys))):
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key, _ in rows]
+                )
+            conn.commit()
+
+            self._hits += sum(1 for key in keys if key in found)
+            self._misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        if not self.enabled or not items:
+            return
+
+        now = time.time()
+        rows = [
+            (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            conn.commit()
+
+    def compact(self, referenced_keys: Iterable[str]) -> int:
+        if not self.enabled:
+            return 0
+
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(now, key) for key in set(referenced_keys)]
+            )
+            removed = conn.execute(
+                "DELETE FROM embeddings WHERE last_used < ?", (now - self.retention_seconds,)
+            ).rowcount
+            conn.commit()
+        return removed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = 0
+            if self.enabled:
+                entries = self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return {
+                "enabled": self.enabled,
+                "entries": entries,
+                "hits": self._hits,
+                "misses": self._misses
+            }
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def _batches(keys: List[str]):
+        for start in range(0, len(keys), _SQLITE_BATCH_SIZE):
+            yield keys[start:start + _SQLITE_BATCH_SIZE]
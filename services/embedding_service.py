@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from dependency_injector.wiring import inject, Provide
+from services.lexical_index import tokenize
+
+
+class SharedEmbeddings(Embeddings):
+
+    def __init__(self, loader: Callable[[], Embeddings], lock: threading.Lock):
+        self._loader = loader
+        self._lock = lock
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        model = self._loader()
+        with self._lock:
+            return model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        model = self._loader()
+        with self._lock:
+            return model.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        model = self._loader()
+        with self._lock:
+            if _queries_encode_as_documents(model):
+                return model.embed_documents(texts)
+            return [model.embed_query(text) for text in texts]
+
+
+def _queries_encode_as_documents(model: Embeddings) -> bool:
+    # HuggingFaceEmbeddings encodes queries differently only when query_encode_kwargs is set.
+    if isinstance(model, HashingEmbeddings):
+        return True
+    return hasattr(model, "query_encode_kwargs") and not model.query_encode_kwargs
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic feature-hashing embeddings for offline benchmarks; no model download."""
+
+    def __init__(self, dimension: int = 768):
+        self.dimension = dimension
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in tokenize(text):
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dimension] += 1.0 if digest & (1 << 63) else -1.0
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+
+class EmbeddingService:
+
+    @inject
+    def __init__(self,
+                 config = Provide["Container.config"],
+                 logging_service = Provide["Container.logging_service"],
+                 metrics = Provide["Container.metrics"]):
+        self.config = config
+        self.provider = self.config.embedding_provider
+        self.model_name = self.config.embedding_model_name
+        if self.provider == "fake":
+            self.model_name = f"fake-hashing-{self.config.embedding_fake_dimension}"
+        self.logger = logging_service.get_logger(__name__)
+
+        self._model: Optional[Embeddings] = None
+        self._load_lock = threading.Lock()
+        self._encode_lock = threading.Lock()
+        self._embeddings = SharedEmbeddings(self._load_model, self._encode_lock)
+
+        self.batch_window_seconds = self.config.embedding_batch_window_ms / 1000
+        self.batch_max_size = self.config.embedding_batch_max_size
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self._batches = metrics.counter("embedding_batches_total", "Query embedding batches encoded")
+        self._batched_queries = metrics.counter("embedding_batched_queries_total", "Queries embedded through batches")
+
+    def get_embeddings(self) -> SharedEmbeddings:
+        return self._embeddings
+
+    def preload(self):
+        self._load_model()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    async def aembed_query(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.batch_max_size:
+            self._flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window_seconds, self._flush, loop)
+
+        return await future
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if not batch:
+            return
+
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        self._batches.inc()
+        self._batched_queries.inc(len(batch))
+
+        encoding = loop.run_in_executor(self._executor, self._encode_batch, texts)
+        encoding.add_done_callback(lambda done: self._deliver(done, texts, batch))
+
+    def _load_model(self) -> Embeddings:
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self.logger.info(f"Embedding: Loading model {self.model_name}")
+                    if self.provider == "fake":
+                        self._model = HashingEmbeddings(self.config.embedding_fake_dimension)
+                    else:
+                        from langchain_huggingface import HuggingFaceEmbeddings
+                        self._model = HuggingFaceEmbeddings(model_name=self.model_name)
+                    self.logger.info("Embedding: Model ready")
+        return self._model
+
+    def _encode_batch(self, texts: List[str]) -> List[List[float]]:
+        return self.get_embeddings().embed_queries(texts)
+
+    @staticmethod
+    def _deliver(done: asyncio.Future, texts: List[str], batch: List[Tuple[str, asyncio.Future]]):
+        cancelled = done.cancelled()
+        error = done.exception() if not cancelled else None
+        vectors = dict(zip(texts, done.result())) if not cancelled and error is None else {}
+
+        for text, future in batch:
+            if future.done():
+                continue
+            if cancelled:
+                future.cancel()
+            elif error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(vectors[text])
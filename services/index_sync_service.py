@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from dependency_injector.wiring import inject, Provide
+
+_MAX_JOB_HISTORY = 20
+_REQUESTS_DIR = "sync_requests"
+_JOBS_FILE = "sync_jobs.json"
+
+
+class IndexSyncService:
+
+    @inject
+    def __init__(self,
+                 config = Provide["Container.config"],
+                 logging_service = Provide["Container.logging_service"],
+                 db_service = Provide["Container.db_service"],
+                 rag_service = Provide["Container.rag_service"],
+                 index_ownership = Provide["Container.index_ownership"]):
+        self.config = config
+        self.db_service = db_service
+        self.rag_service = rag_service
+        self.index_ownership = index_ownership
+        self.logger = logging_service.get_logger(__name__)
+        self._requests_path = os.path.join(config.vector_db_path, _REQUESTS_DIR)
+        self._jobs_path = os.path.join(config.vector_db_path, _JOBS_FILE)
+
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-sync")
+
+    def submit(self, documents: List[Dict]) -> Dict:
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "documents_count": len(documents),
+            "chunks_total": 0,
+            "chunks_embedded": 0,
+            "progress": 0.0,
+            "message": None,
+            "created_at": self._now(),
+            "started_at": None,
+            "finished_at": None
+        }
+
+        if self.index_ownership is not None and not self.index_ownership.is_leader:
+            self._forward(job, documents)
+            return job
+        return self._enqueue(job, documents)
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return dict(job)
+        if self.index_ownership is None:
+            return None
+
+        # Jobs built by the owning worker, or forwarded and not yet picked up.
+        jobs = self._read_json(self._jobs_path) or {}
+        if job_id in jobs:
+            return jobs[job_id]
+        path = self._forwarded_path(job_id)
+        request = self._read_json(path) if path else None
+        return request["job"] if request else None
+
+    def claim_forwarded(self):
+        """Runs queued sync requests that other workers forwarded to this one."""
+        try:
+            names = sorted(os.listdir(self._requests_path))
+        except FileNotFoundError:
+            return
+
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self._requests_path, name)
+            request = self._read_json(path)
+            os.remove(path)
+            if request:
+                self._enqueue(request["job"], request["documents"])
+
+    def collect_garbage(self):
+        for collection_name in self.db_service.inactive_collections():
+            self._drop_when_unused(collection_name)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _enqueue(self, job: Dict, documents: List[Dict]) -> Dict:
+        job_id = job["job_id"]
+        with self._lock:
+            self._jobs[job_id] = job
+            while len(self._jobs) > _MAX_JOB_HISTORY:
+                self._jobs.popitem(last=False)
+            self._publish_jobs()
+
+        self._executor.submit(self._run, job_id, documents)
+        self.logger.info(f"DB: Sync job {job_id} queued ({len(documents)} documents)")
+        return dict(job)
+
+    def _forward(self, job: Dict, documents: List[Dict]):
+        os.makedirs(self._requests_path, exist_ok=True)
+        # Sortable names keep forwarded requests in arrival order.
+        name = f"{time.time_ns():020d}-{job['job_id']}.json"
+        self._write_json(os.path.join(self._requests_path, name), {"job": job, "documents": documents})
+        self.logger.info(f"DB: Sync job {job['job_id']} forwarded to the indexing worker ({len(documents)} documents)")
+
+    def _run(self, job_id: str, documents: List[Dict]):
+        self._update(job_id, status="running", started_at=self._now())
+
+        try:
+            previous = self.db_service.active_collection
+            vectorstore = self.db_service.setup_database(
+                documents,
+                progress=lambda done, total: self._update(
+                    job_id,
+                    chunks_embedded=done,
+                    chunks_total=total,
+                    progress=round(done / total, 4) if total else 1.0
+                )
+            )
+
+            if vectorstore is None:
+                self._update(job_id, status="failed", message="No documents available", finished_at=self._now())
+                return
+
+            if self.db_service.active_collection != previous:
+                lexical_index = self.db_service.load_lexical_index() if self.config.hybrid_enabled else None
+                self.rag_service.set_vectorstore(vectorstore, lexical_index)
+                if self.index_ownership is not None:
+                    self.index_ownership.serve(self.db_service.active_collection)
+                self._schedule_drop(previous)
+                message = f"Vector database rebuilt with {len(documents)} documents"
+            else:
+                message = "Vector database already up to date"
+
+            self.logger.info(f"DB: Sync job {job_id} completed - {message}")
+            self._update(job_id, status="completed", progress=1.0, message=message, finished_at=self._now())
+
+        except Exception as e:
+            self.logger.error(f"DB: Sync job {job_id} failed - {e}")
+            self._update(job_id, status="failed", message=str(e), finished_at=self._now())
+
+    def _schedule_drop(self, collection_name: str):
+        timer = threading.Timer(
+            self.config.vector_db_swap_grace_seconds,
+            self._drop_when_unused,
+            args=(collection_name,)
+        )
+        timer.daemon = True
+        timer.start()
+
+    def _drop_when_unused(self, collection_name: str):
+        if self.index_ownership is not None and collection_name in self.index_ownership.in_use():
+            self._schedule_drop(collection_name)
+            return
+        self.db_service.drop_collection(collection_name)
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields)
+                self._publish_jobs()
+
+    def _publish_jobs(self):
+        if self.index_ownership is not None:
+            self._write_json(self._jobs_path, self._jobs)
+
+    def _forwarded_path(self, job_id: str) -> Optional[str]:
+        try:
+            names = os.listdir(self._requests_path)
+        except FileNotFoundError:
+            return None
+        name = next((name for name in names if name.endswith(f"-{job_id}.json")), None)
+        return os.path.join(self._requests_path, name) if name else None
+
+    @staticmethod
+    def _read_json(path: str) -> Optional[Dict]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_json(path: str, content):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(content, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat()
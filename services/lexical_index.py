@@ -0,0 +1,132 @@
+import re
+import math
+import unicodedata
+from typing import Dict, List, Tuple
+import numpy as np
+from langchain_core.documents import Document
+
+_TOKEN_RE = re.compile(r"\d+(?:[.,]\d+)*|[a-z0-9]+")
+_NUMBER_SEPARATORS_RE = re.compile(r"[.,]")
+
+
+def fold_diacritics(text: str) -> str:
+    text = unicodedata.normalize("NFD", text.lower())
+    text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
+    return text.replace("đ", "d")
+
+
+def tokenize(text: str) -> List[str]:
+    syllables = [
+        _NUMBER_SEPARATORS_RE.sub("", token) if token[0].isdigit() else token
+        for token in _TOKEN_RE.findall(fold_diacritics(text))
+    ]
+    bigrams = [f"{a}_{b}" for a, b in zip(syllables, syllables[1:])]
+    return syllables + bigrams
+
+
+class LexicalIndex:
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict] = []
+        self._vocabulary: Dict[str, int] = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._postings = np.zeros(0, dtype=np.int32)
+        self._frequencies = np.zeros(0, dtype=np.float32)
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._length_norm = np.zeros(0, dtype=np.float32)
+
+    @classmethod
+    def build(cls, ids: List[str], texts: List[str], metadatas: List[Dict], **kwargs) -> "LexicalIndex":
+        index = cls(**kwargs)
+        index.ids = list(ids)
+        index.texts = list(texts)
+        index.metadatas = [dict(m or {}) for m in metadatas]
+
+        term_postings: Dict[int, Dict[int, int]] = {}
+        lengths = np.zeros(len(texts), dtype=np.float32)
+
+        for doc_index, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[doc_index] = len(tokens)
+            for token in tokens:
+                term_id = index._vocabulary.setdefault(token, len(index._vocabulary))
+                postings = term_postings.setdefault(term_id, {})
+                postings[doc_index] = postings.get(doc_index, 0) + 1
+
+        term_count = len(index._vocabulary)
+        document_frequency = np.zeros(term_count, dtype=np.int64)
+        for term_id, postings in term_postings.items():
+            document_frequency[term_id] = len(postings)
+
+        index._offsets = np.zeros(term_count + 1, dtype=np.int64)
+        np.cumsum(document_frequency, out=index._offsets[1:])
+        index._postings = np.empty(int(index._offsets[-1]), dtype=np.int32)
+        index._frequencies = np.empty(int(index._offsets[-1]), dtype=np.float32)
+
+        for term_id, postings in term_postings.items():
+            start = index._offsets[term_id]
+            index._postings[start:start + len(postings)] = list(postings.keys())
+            index._frequencies[start:start + len(postings)] = list(postings.values())
+
+        doc_count = max(len(texts), 1)
+        index._idf = np.log(
+            1.0 + (doc_count - document_frequency + 0.5) / (document_frequency + 0.5)
+        ).astype(np.float32)
+
+        average_length = float(lengths.mean()) if len(texts) else 0.0
+        if average_length > 0:
+            index._length_norm = (index.k1 * (1 - index.b + index.b * lengths / average_length)).astype(np.float32)
+        else:
+            index._length_norm = np.full(len(texts), index.k1, dtype=np.float32)
+
+        return index
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[Document, float]]:
+        if not self.ids or k <= 0:
+            return []
+
+        term_ids = {self._vocabulary[t] for t in tokenize(query) if t in self._vocabulary}
+        if not term_ids:
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            docs = self._postings[start:end]
+            tf = self._frequencies[start:end]
+            scores[docs] += self._idf[term_id] * tf * (self.k1 + 1) / (tf + self._length_norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(scores[matched], len(matched) - k)[len(matched) - k:]]
+        matched = matched[np.argsort(scores[matched])[::-1]]
+
+        return [(self._document(int(i)), float(scores[i])) for i in matched]
+
+    def _document(self, index: int) -> Document:
+        return Document(
+            id=self.ids[index],
+            page_content=self.texts[index],
+            metadata=self.metadatas[index]
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+
+    for results in result_lists:
+        for rank, doc in enumerate(results):
+            key = doc.id or f"{doc.metadata.get('id', '')}:{hash(doc.page_content)}"
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+            documents.setdefault(key, doc)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ranked[:k]]
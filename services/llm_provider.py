@@ -0,0 +1,216 @@
+import json
+import math
+import time
+import random
+import hashlib
+import threading
+import httpx
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from pydantic import PrivateAttr
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from langchain_google_genai import GoogleGenerativeAI
+
+_FAKE_VOCABULARY = (
+    "Ký túc xá PTIT mở cửa từ 5 giờ sáng đến 23 giờ tối. Sinh viên vui lòng mang thẻ khi ra vào, "
+    "đóng phí đúng hạn và liên hệ Ban Quản lý KTX để được hỗ trợ thêm nhé."
+).split()
+
+
+class OpenAICompatibleLLM(LLM):
+    """Chat-completions client for local OpenAI-compatible servers (vLLM, llama.cpp, Ollama...)."""
+
+    base_url: str
+    model: str
+    api_key: Optional[str] = None
+    temperature: float = 0.2
+    max_tokens: int = 2000
+    timeout_seconds: float = 60.0
+
+    _client: Optional[httpx.Client] = PrivateAttr(default=None)
+    _client_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "openai-compatible"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"base_url": self.base_url, "model": self.model}
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> str:
+        response = self._get_client().post("/chat/completions", json=self._payload(prompt, stop, stream=False))
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"].get("content") or ""
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[GenerationChunk]:
+        with self._get_client().stream("POST", "/chat/completions", json=self._payload(prompt, stop, stream=True)) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or []
+                text = choices[0].get("delta", {}).get("content") if choices else None
+                if text:
+                    chunk = GenerationChunk(text=text)
+                    if run_manager:
+                        run_manager.on_llm_new_token(text, chunk=chunk)
+                    yield chunk
+
+    def _payload(self, prompt: str, stop: Optional[List[str]], stream: bool) -> Dict[str, Any]:
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "stream": stream
+        }
+        if stop:
+            payload["stop"] = stop
+        return payload
+
+    def _get_client(self) -> httpx.Client:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+                    self._client = httpx.Client(
+                        base_url=self.base_url.rstrip("/"),
+                        headers=headers,
+                        timeout=self.timeout_seconds
+                    )
+        return self._client
+
+
+class FakeLLM(LLM):
+    """Offline LLM for load tests: deterministic text, sampled time-to-first-token, fixed token rate."""
+
+    latency_ms: float = 800.0
+    latency_jitter_ms: float = 200.0
+    latency_distribution: str = "lognormal"
+    tokens_per_second: float = 40.0
+    response_tokens: int = 80
+    seed: int = 0
+
+    _rng: random.Random = PrivateAttr()
+    _rng_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> str:
+        return "".join(chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs))
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[GenerationChunk]:
+        time.sleep(self.sample_latency())
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+        for index, token in enumerate(self._tokens(prompt)):
+            if index and interval:
+                time.sleep(interval)
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def sample_latency(self) -> float:
+        mean = self.latency_ms / 1000
+        jitter = self.latency_jitter_ms / 1000
+        with self._rng_lock:
+            if self.latency_distribution == "constant" or jitter <= 0 or mean <= 0:
+                sample = mean
+            elif self.latency_distribution == "uniform":
+                sample = self._rng.uniform(mean - jitter, mean + jitter)
+            elif self.latency_distribution == "normal":
+                sample = self._rng.gauss(mean, jitter)
+            else:
+                sigma = math.sqrt(math.log(1 + (jitter / mean) ** 2))
+                sample = self._rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+        return max(sample, 0.0)
+
+    def _tokens(self, prompt: str) -> List[str]:
+        offset = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        return [
+            _FAKE_VOCABULARY[(offset + i) % len(_FAKE_VOCABULARY)] + " "
+            for i in range(self.response_tokens)
+        ]
+
+
+def _gemini(config) -> LLM:
+    return GoogleGenerativeAI(
+        model=config.llm_model_name,
+        temperature=config.temperature,
+        max_output_tokens=config.max_response_tokens,
+        google_api_key=config.google_api_key
+    )
+
+
+def _openai_compatible(config) -> LLM:
+    if not config.llm_base_url:
+        raise ValueError("LLM_BASE_URL is required for the openai provider")
+    return OpenAICompatibleLLM(
+        base_url=config.llm_base_url,
+        model=config.llm_model_name,
+        api_key=config.llm_api_key,
+        temperature=config.temperature,
+        max_tokens=config.max_response_tokens,
+        timeout_seconds=config.llm_timeout_seconds
+    )
+
+
+def _fake(config) -> LLM:
+    return FakeLLM(
+        latency_ms=config.fake_llm_latency_ms,
+        latency_jitter_ms=config.fake_llm_latency_jitter_ms,
+        latency_distribution=config.fake_llm_latency_distribution,
+        tokens_per_second=config.fake_llm_tokens_per_second,
+        response_tokens=config.fake_llm_response_tokens,
+        seed=config.fake_llm_seed
+    )
+
+
+LLM_PROVIDERS: Dict[str, Callable[[Any], LLM]] = {
+    "gemini": _gemini,
+    "openai": _openai_compatible,
+    "fake": _fake,
+}
+
+
+def create_llm(config) -> LLM:
+    provider = LLM_PROVIDERS.get(config.llm_provider)
+    if provider is None:
+        raise ValueError(f"Unknown LLM_PROVIDER '{config.llm_provider}' (expected one of {', '.join(LLM_PROVIDERS)})")
+    return provider(config)
@@ -0,0 +1,124 @@
+import os
+import gzip
+import time
+import zipfile
+from typing import Iterable, Iterator, List, Optional
+
+CHUNK_SIZE = 64 * 1024
+ARCHIVE_FORMATS = ("zip", "gzip", "zstd")
+MEDIA_TYPES = {
+    "zip": "application/zip",
+    "gzip": "application/gzip",
+    "zstd": "application/zstd"
+}
+EXTENSIONS = {"zip": "zip", "gzip": "log.gz", "zstd": "log.zst"}
+
+
+class _ChunkSink:
+    """Write-only, unseekable file object that collects compressed output between reads."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._size = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+            self._size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def __len__(self) -> int:
+        return self._size
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self._size = 0
+        return data
+
+
+def stream_archive(log_files: List[str], archive_format: str = "zip", lines_for=None,
+                   chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """With `lines_for`, each file's returned lines are archived instead of its raw bytes."""
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unsupported archive format: {archive_format}")
+
+    sink = _ChunkSink()
+    if archive_format == "zip":
+        return _stream_zip(log_files, sink, lines_for, chunk_size)
+    if archive_format == "gzip":
+        writer = gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=6)
+    else:
+        writer = _zstd_writer(sink)
+    return _stream_single(log_files, sink, writer, lines_for, chunk_size)
+
+
+def _stream_zip(log_files, sink: _ChunkSink, lines_for, chunk_size: int) -> Iterator[bytes]:
+    # An unseekable target makes zipfile emit data descriptors instead of rewriting headers.
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+        for log_file in log_files:
+            info = zipfile.ZipInfo(os.path.basename(log_file), time.localtime(os.path.getmtime(log_file))[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, "w", force_zip64=True) as entry:
+                for data in _file_chunks(log_file, lines_for, chunk_size):
+                    entry.write(data)
+                    if len(sink) >= chunk_size:
+                        yield sink.drain()
+    if len(sink):
+        yield sink.drain()
+
+
+def _stream_single(log_files, sink: _ChunkSink, writer, lines_for, chunk_size: int) -> Iterator[bytes]:
+    with writer:
+        for log_file in log_files:
+            for data in _file_chunks(log_file, lines_for, chunk_size):
+                writer.write(data)
+                if len(sink) >= chunk_size:
+                    yield sink.drain()
+    if len(sink):
+        yield sink.drain()
+
+
+def _file_chunks(log_file: str, lines_for, chunk_size: int) -> Iterator[bytes]:
+    if lines_for is None:
+        try:
+            with open(log_file, "rb") as f:
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        return
+                    yield data
+        except FileNotFoundError:
+            return  # rotated away since the listing
+    else:
+        yield from _batch_lines(lines_for(log_file), chunk_size)
+
+
+def _batch_lines(lines: Iterable[str], chunk_size: int) -> Iterator[bytes]:
+    batch: List[bytes] = []
+    size = 0
+    for line in lines:
+        data = (line + "\n").encode("utf-8")
+        batch.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b"".join(batch)
+            batch.clear()
+            size = 0
+    if batch:
+        yield b"".join(batch)
+
+
+def _zstd_writer(sink: _ChunkSink):
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd compression requires the 'zstandard' package")
+    return zstandard.ZstdCompressor(level=3).stream_writer(sink, closefd=False)
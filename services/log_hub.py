@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Deque, List, Optional, Set, Tuple
+
+
+class LogSubscription:
+    """One viewer's bounded queue; when full, the oldest entries are dropped and counted."""
+
+    def __init__(self, max_pending: int):
+        self._pending: Deque[str] = deque(maxlen=max_pending)
+        self._event = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, lines: List[str]):
+        overflow = len(self._pending) + len(lines) - self._pending.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        self._pending.extend(lines)
+        self._event.set()
+
+    async def next_batch(self, max_lines: int, batch_interval: float) -> Tuple[List[str], int]:
+        """Waits for new lines, lets a short burst accumulate, then returns (lines, dropped since last call)."""
+        await self._event.wait()
+        if batch_interval > 0:
+            await asyncio.sleep(batch_interval)
+        self._event.clear()
+
+        count = min(max_lines, len(self._pending))
+        lines = [self._pending.popleft() for _ in range(count)]
+        if self._pending:
+            self._event.set()
+
+        dropped, self.dropped = self.dropped, 0
+        return lines, dropped
+
+
+class LogHub(logging.Handler):
+    """Fans formatted log lines out to /ws/logs viewers, keeping recent lines for new ones."""
+
+    def __init__(self, buffer_size: int = 2000, subscriber_queue_size: int = 1000, metrics = None):
+        super().__init__(logging.INFO)
+        self.subscriber_queue_size = subscriber_queue_size
+        self._buffer: Deque[Tuple[float, str]] = deque(maxlen=buffer_size)
+        self._outbox: List[str] = []
+        self._subscribers: Set[LogSubscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_scheduled = False
+        self._state_lock = threading.Lock()
+        self._dropped = None
+
+        if metrics is not None:
+            metrics.gauge("log_stream_subscribers", "Connected /ws/logs viewers", lambda: len(self._subscribers))
+            self._dropped = metrics.counter(
+                "log_stream_dropped_total", "Log lines dropped for /ws/logs viewers that fell behind"
+            )
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        self.publish([line], record.created)
+
+    def publish(self, lines: List[str], created: float):
+        with self._state_lock:
+            self._buffer.extend((created, line) for line in lines)
+            if not self._subscribers:
+                return
+            self._outbox.extend(lines)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+            loop = self._loop
+
+        try:
+            loop.call_soon_threadsafe(self._flush)
+        except RuntimeError:
+            with self._state_lock:
+                self._flush_scheduled = False
+                self._outbox.clear()
+
+    def subscribe(self, since: Optional[float] = None) -> Tuple[LogSubscription, Optional[List[str]]]:
+        """Also returns the buffered lines newer than `since`, or None when the buffer does not reach back that far."""
+        subscription = LogSubscription(self.subscriber_queue_size)
+        with self._state_lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.add(subscription)
+            snapshot = list(self._buffer)
+
+        if since is None:
+            return subscription, []
+        if snapshot and snapshot[0][0] < since:
+            return subscription, [line for created, line in snapshot if created >= since]
+        return subscription, None
+
+    def unsubscribe(self, subscription: LogSubscription):
+        with self._state_lock:
+            self._subscribers.discard(subscription)
+
+    def after_fork(self):
+        """Forked children start with no viewers and a fresh lock (the parent's may have been held mid-fork)."""
+        self._buffer.clear()
+        self._state_lock = threading.Lock()
+        self._subscribers = set()
+        self._outbox = []
+        self._flush_scheduled = False
+        self._loop = None
+
+    def record_dropped(self, count: int):
+        if self._dropped is not None and count:
+            self._dropped.inc(count)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _flush(self):
+        with self._state_lock:
+            lines, self._outbox = self._outbox, []
+            self._flush_scheduled = False
+            subscribers = list(self._subscribers)
+
+        if lines:
+            for subscription in subscribers:
+                subscription.push(lines)
@@ -0,0 +1,144 @@
+import os
+import bisect
+import logging
+from datetime import datetime, timezone, timedelta
+from logging.handlers import RotatingFileHandler
+from typing import Iterator, Optional, Tuple
+import numpy as np
+
+VIETNAM_TZ = timezone(timedelta(hours=7))
+INDEX_SUFFIX = ".idx"
+INDEX_DTYPE = np.dtype([("ts", "<i8"), ("offset", "<u8")])
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def index_path(log_path: str) -> str:
+    return log_path + INDEX_SUFFIX
+
+
+def parse_timestamp(line: str) -> Optional[float]:
+    if not line.startswith("[") or len(line) < 21 or line[20] != "]":
+        return None
+    try:
+        return datetime.strptime(line[1:20], TIMESTAMP_FORMAT).replace(tzinfo=VIETNAM_TZ).timestamp()
+    except ValueError:
+        return None
+
+
+def read_index(log_path: str) -> np.ndarray:
+    """Sparse (timestamp, byte offset) entries for a log file; empty when no sidecar exists."""
+    try:
+        entries = np.fromfile(index_path(log_path), dtype=INDEX_DTYPE)
+        size = os.path.getsize(log_path)
+    except (FileNotFoundError, ValueError):
+        return np.zeros(0, dtype=INDEX_DTYPE)
+    return entries[entries["offset"] <= size]
+
+
+def file_time_range(log_path: str) -> Tuple[Optional[float], float]:
+    """(first record time or None, last write time) without scanning the file."""
+    entries = read_index(log_path)
+    start = None
+    if len(entries) and entries["offset"][0] == 0:
+        start = float(entries["ts"][0])
+    else:
+        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+            start = parse_timestamp(f.readline())
+    return start, os.path.getmtime(log_path)
+
+
+def iter_lines_in_range(log_path: str, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[str]:
+    """Lines within [start, end]; lines without a timestamp (tracebacks) follow their record."""
+    entries = read_index(log_path)
+    timestamps = entries["ts"].tolist()
+    offsets = entries["offset"].tolist()
+
+    offset = 0
+    if start is not None and timestamps:
+        position = bisect.bisect_left(timestamps, int(start)) - 1
+        if position >= 0:
+            offset = offsets[position]
+
+    check_from = 0
+    if end is not None and timestamps:
+        position = bisect.bisect_right(timestamps, int(end))
+        if position > 0:
+            check_from = offsets[position - 1]
+
+    with open(log_path, "rb") as f:
+        f.seek(offset)
+        position = offset
+        in_window = start is None
+        for raw in f:
+            line_offset, position = position, position + len(raw)
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+
+            if not in_window:
+                timestamp = parse_timestamp(line)
+                if timestamp is None or timestamp < start:
+                    continue
+                in_window = True
+
+            if end is not None and line_offset >= check_from:
+                timestamp = parse_timestamp(line)
+                if timestamp is not None and timestamp > end:
+                    return
+
+            yield line
+
+
+class IndexedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that appends a (timestamp, offset) entry to a sidecar every N records."""
+
+    def __init__(self, filename: str, index_interval: int = 256, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.index_interval = index_interval
+        self._records = 0
+        self._discard_stale_index()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self._records % self.index_interval == 0:
+                self._append_index_entry(record)
+            self._records += 1
+            logging.FileHandler.emit(self, record)
+        except Exception:
+            self.handleError(record)
+
+    def doRollover(self):
+        if self.backupCount > 0:
+            for i in range(self.backupCount - 1, 0, -1):
+                source = index_path(f"{self.baseFilename}.{i}")
+                if os.path.exists(source):
+                    os.replace(source, index_path(f"{self.baseFilename}.{i + 1}"))
+            if os.path.exists(index_path(self.baseFilename)):
+                os.replace(index_path(self.baseFilename), index_path(f"{self.baseFilename}.1"))
+        else:
+            self._remove_index()
+        super().doRollover()
+        self._records = 0
+
+    def _append_index_entry(self, record: logging.LogRecord):
+        if self.stream is None:
+            self.stream = self._open()
+        self.stream.flush()
+        offset = os.fstat(self.stream.fileno()).st_size
+        entry = np.array([(int(record.created), offset)], dtype=INDEX_DTYPE)
+        with open(index_path(self.baseFilename), "ab") as f:
+            f.write(entry.tobytes())
+
+    def _discard_stale_index(self):
+        entries = np.zeros(0, dtype=INDEX_DTYPE)
+        if os.path.exists(index_path(self.baseFilename)):
+            entries = np.fromfile(index_path(self.baseFilename), dtype=INDEX_DTYPE)
+        size = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+        if len(entries) and int(entries["offset"][-1]) > size:
+            self._remove_index()
+
+    def _remove_index(self):
+        try:
+            os.remove(index_path(self.baseFilename))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,115 @@
+import os
+import time
+import threading
+from typing import Callable, Iterator, List, Optional, Tuple
+
+BLOCK_SIZE = 64 * 1024
+
+
+def iter_lines_reverse(log_path: str, end: Optional[int] = None, block_size: int = BLOCK_SIZE) -> Iterator[Tuple[int, str]]:
+    """(byte offset, line) pairs from `end` (default EOF) backwards; a trailing partial line is skipped."""
+    with open(log_path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        position = size if end is None else min(end, size)
+
+        buffer = b""
+        stop = 0
+        trailing = True
+        while position > 0:
+            read = min(block_size, position)
+            position -= read
+            f.seek(position)
+            buffer = f.read(read) + buffer[:stop]
+            stop = len(buffer)
+
+            cut = buffer.rfind(b"\n", 0, stop)
+            while cut != -1:
+                if trailing:
+                    trailing = False
+                else:
+                    yield position + cut + 1, _decode(buffer[cut + 1:stop])
+                stop = cut
+                cut = buffer.rfind(b"\n", 0, stop)
+
+        if stop and not trailing:
+            yield 0, _decode(buffer[:stop])
+
+
+class LogFollower:
+    """Hands lines appended to a log file, across rotations, to `on_lines` from a daemon thread."""
+
+    def __init__(self, log_path: str, on_lines: Callable[[List[str], float], None], poll_interval: float = 0.2):
+        self._log_path = log_path
+        self._on_lines = on_lines
+        self._poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        f = self._open()
+        if f is not None:
+            f.seek(0, os.SEEK_END)
+        self._thread = threading.Thread(target=self._run, args=(f,), name="log-follower", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, f):
+        partial = b""
+        try:
+            while not self._stop.wait(self._poll_interval):
+                if f is None:
+                    f = self._open()
+                    if f is None:
+                        continue
+
+                chunk = f.read()
+                try:
+                    current = os.stat(self._log_path)
+                except FileNotFoundError:
+                    current = None
+                if current is not None and current.st_ino != os.fstat(f.fileno()).st_ino:
+                    # Rotated: the old file was drained above, the new one is read from its start.
+                    f.close()
+                    f = self._open()
+                    if f is not None:
+                        chunk += f.read()
+                elif current is not None and current.st_size < f.tell():
+                    f.seek(0)
+                    partial = b""
+                    chunk = f.read()
+
+                lines = (partial + chunk).split(b"\n")
+                partial = lines.pop()
+                if lines:
+                    self._on_lines([_decode(line) for line in lines], time.time())
+        finally:
+            if f is not None:
+                f.close()
+
+    def _open(self):
+        try:
+            return open(self._log_path, "rb")
+        except FileNotFoundError:
+            return None
+
+
+def encode_cursor(log_path: str, offset: int) -> str:
+    """Cursors name the file by inode, which survives the renames done by rotation."""
+    return f"{os.stat(log_path).st_ino}-{offset}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        inode, offset = cursor.split("-", 1)
+        return int(inode), int(offset)
+    except ValueError:
+        raise ValueError(f"Invalid log cursor: {cursor}")
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace").rstrip("\r")
@@ -1,46 +1,114 @@
 import logging
 import os
 import glob
-import zipfile
+import queue
+import atexit
+import multiprocessing
+from itertools import dropwhile
 from datetime import datetime, timezone, timedelta
-from logging.handlers import RotatingFileHandler
-from typing import List
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Iterator, List, Optional
 from pathlib import Path
+from services.log_index import (
+    INDEX_SUFFIX, VIETNAM_TZ, IndexedRotatingFileHandler, file_time_range, iter_lines_in_range
+)
+from services.log_tail import LogFollower, decode_cursor, encode_cursor, iter_lines_reverse
+from services.log_archive import stream_archive
+
 
 class VietnamFormatter(logging.Formatter):
     
+    def __init__(self):
+        super().__init__()
+        self._prefixes: Dict[str, str] = {}
+        self._second = None
+        self._timestamp = ""
+    
     def format(self, record: logging.LogRecord) -> str:
-        vietnam_tz = timezone(timedelta(hours=7))
-        timestamp = datetime.now(vietnam_tz).strftime('%Y-%m-%d %H:%M:%S')
+        second = int(record.created)
+        if second != self._second:
+            self._second = second
+            self._timestamp = datetime.fromtimestamp(second, VIETNAM_TZ).strftime('%Y-%m-%d %H:%M:%S')
         message = record.getMessage()
         
-        module_name = record.name
-        service_prefix = "SERVER"
+        service_prefix = self._prefixes.get(record.name)
+        if service_prefix is None:
+            service_prefix = self._prefixes.setdefault(record.name, self._service_prefix(record.name))
         
-        if "database" in module_name.lower() or "db" in module_name.lower():
-            service_prefix = "DB"
-        elif "rag" in module_name.lower():
-            service_prefix = "RAG"
-        elif "backend" in module_name.lower() or "api" in module_name.lower():
-            service_prefix = "API"
-        elif "websocket" in module_name.lower() or "chat" in module_name.lower():
-            service_prefix = "WS"
-        
-        if record.levelname in ['WARNING', 'ERROR', 'CRITICAL']:
-            return f"[{timestamp}] {service_prefix}: {record.levelname}: {message}"
+        if record.levelno >= logging.WARNING:
+            return f"[{self._timestamp}] {service_prefix}: {record.levelname}: {message}"
         else:
-            return f"[{timestamp}] {service_prefix}: {message}"
+            return f"[{self._timestamp}] {service_prefix}: {message}"
+    
+    @staticmethod
+    def _service_prefix(module_name: str) -> str:
+        module_name = module_name.lower()
+        if "database" in module_name or "db" in module_name:
+            return "DB"
+        elif "rag" in module_name:
+            return "RAG"
+        elif "backend" in module_name or "api" in module_name:
+            return "API"
+        elif "websocket" in module_name or "chat" in module_name:
+            return "WS"
+        return "SERVER"
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Never blocks the caller: records are dropped (and counted) when the queue is full."""
+    
+    def __init__(self, log_queue: queue.Queue, dropped_counter = None):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_counter = dropped_counter
+        self._reported = 0
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if self._dropped_counter is not None:
+                self._dropped_counter.inc()
+            return
+        
+        if self.dropped != self._reported:
+            missed, self._reported = self.dropped - self._reported, self.dropped
+            notice = logging.makeLogRecord({
+                "name": __name__,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"Logging: dropped {missed} records (queue full)"
+            })
+            try:
+                self.queue.put_nowait(notice)
+            except queue.Full:
+                pass
 
 
 class LoggingService:
     
-    def __init__(self):
+    def __init__(self, queue_size: int = 10000, metrics = None, log_hub = None, workers: int = 1):
         self._log_dir = "logs"
         self._log_file = "app.log"
         self._max_bytes = 10 * 1024 * 1024  # 10MB
         self._backup_count = 5
+        self._index_interval = 256
+        self._queue_size = queue_size
+        self._log_hub = log_hub
+        self._multiprocess = workers > 1
+        self._log_follower = None
         self.logs_dir = Path(self._log_dir)
+        self._listener = None
+        self._dropped_counter = None
+        if metrics is not None:
+            self._dropped_counter = metrics.counter(
+                "log_records_dropped_total", "Log records dropped because the queue was full"
+            )
         self._setup_logging()
+        
+        if metrics is not None:
+            metrics.gauge("log_queue_depth", "Log records waiting for the writer thread", self._queue.qsize)
     
     def _setup_logging(self):
         os.makedirs(self._log_dir, exist_ok=True)
@@ -48,27 +116,79 @@ class LoggingService:
         logger = logging.getLogger()
         logger.setLevel(logging.INFO)
         
+        for handler in logger.handlers:
+            if isinstance(handler, DroppingQueueHandler) and handler.listener:
+                handler.listener.stop()
         logger.handlers.clear()
         
         log_path = os.path.join(self._log_dir, self._log_file)
-        file_handler = RotatingFileHandler(
+        formatter = VietnamFormatter()
+        file_handler = IndexedRotatingFileHandler(
             log_path,
+            index_interval=self._index_interval,
             maxBytes=self._max_bytes,
             backupCount=self._backup_count,
             encoding='utf-8'
         )
         file_handler.setLevel(logging.INFO)
-        file_handler.setFormatter(VietnamFormatter())
+        file_handler.setFormatter(formatter)
         
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(VietnamFormatter())
+        console_handler.setFormatter(formatter)
+        
+        handlers = [file_handler, console_handler]
+        if self._log_hub is not None:
+            self._log_hub.setFormatter(formatter)
+            handlers.append(self._log_hub)
         
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        if self._multiprocess:
+            # Preloaded workers inherit this queue, so the listener in the master stays the
+            # only writer of the log files (and the only one rotating them).
+            self._queue = multiprocessing.Queue(maxsize=self._queue_size)
+        else:
+            self._queue = queue.Queue(maxsize=self._queue_size)
+        self._queue_handler = DroppingQueueHandler(self._queue, self._dropped_counter)
+        self._listener = QueueListener(self._queue, *handlers, respect_handler_level=True)
+        self._queue_handler.listener = self._listener
+        self._listener.start()
+        atexit.register(self.shutdown)
+        
+        logger.addHandler(self._queue_handler)
         
         logger.info(f"Logging initialized: {log_path}")
     
+    @property
+    def dropped_records(self) -> int:
+        return self._queue_handler.dropped
+    
+    def after_fork(self):
+        """Re-arms logging in a worker forked from a preloaded master; threads do not survive fork."""
+        self._listener = None
+        self._queue_handler.listener = None
+        if self._log_hub is not None:
+            self._log_hub.after_fork()
+        
+        if not self._multiprocess:
+            self._setup_logging()
+            return
+        
+        # gunicorn forks with os.fork, which skips multiprocessing's own after-fork reset.
+        self._queue._after_fork()
+        if self._log_hub is not None:
+            # Only the master sees every worker's records; viewers here follow the file it writes.
+            self._log_follower = LogFollower(self.get_log_file_path(), self._log_hub.publish)
+            self._log_follower.start()
+    
+    def shutdown(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+            self._queue_handler.listener = None
+        if self._log_follower is not None:
+            self._log_follower.stop()
+            self._log_follower = None
+    
     def get_logger(self, name: str) -> logging.Logger:
         return logging.getLogger(name)
     
@@ -77,49 +197,73 @@ class LoggingService:
     
     def get_all_log_files(self) -> List[str]:
         log_pattern = os.path.join(self._log_dir, f"{self._log_file}*")
-        log_files = glob.glob(log_pattern)
+        log_files = [path for path in glob.glob(log_pattern) if not path.endswith(INDEX_SUFFIX)]
         log_files.sort(key=os.path.getmtime, reverse=True)
         return log_files
     
-    def get_log_lines_from_time(self, minutes_ago: int = 5) -> List[str]:
-        vietnam_tz = timezone(timedelta(hours=7))
-        cutoff_time = datetime.now(vietnam_tz) - timedelta(minutes=minutes_ago)
-        
-        matching_lines = []
-        log_files = self.get_all_log_files()
-        
-        for log_file in log_files:
+    def iter_log_lines(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[str]:
+        """Chronological lines in [start, end] (epoch seconds) across rotated files."""
+        for log_file in self.get_log_files_in_range(start, end):
             try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        if line.startswith('['):
-                            try:
-                                timestamp_str = line[1:20]
-                                log_time = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-                                log_time = log_time.replace(tzinfo=vietnam_tz)
-                                
-                                if log_time >= cutoff_time:
-                                    matching_lines.append(line.rstrip('\n'))
-                            except (ValueError, IndexError):
-                                continue
-            except Exception:
+                yield from iter_lines_in_range(log_file, start, end)
+            except OSError:
                 continue
-        
-        return matching_lines
+    
+    def get_log_files_in_range(self, start: Optional[float] = None, end: Optional[float] = None) -> List[str]:
+        """Log files (oldest first) that may hold records in [start, end], judged without scanning them."""
+        log_files = []
+        for log_file in sorted(self.get_all_log_files(), key=self._rotation_number, reverse=True):
+            try:
+                first_time, last_write = file_time_range(log_file)
+            except OSError:
+                continue
+            if start is not None and last_write < start:
+                continue
+            if end is not None and first_time is not None and first_time > end:
+                continue
+            log_files.append(log_file)
+        return log_files
+    
+    def _rotation_number(self, log_file: str) -> int:
+        suffix = log_file.rsplit(self._log_file, 1)[-1].lstrip('.')
+        return int(suffix) if suffix.isdigit() else 0
+    
+    def get_log_lines_from_time(self, minutes_ago: int = 5) -> List[str]:
+        cutoff_time = datetime.now(VIETNAM_TZ) - timedelta(minutes=minutes_ago)
+        return list(self.iter_log_lines(start=cutoff_time.timestamp()))
     
     def tail_log_file(self, num_lines: int = 100) -> List[str]:
-        log_file = self.get_log_file_path()
-        
-        if not os.path.exists(log_file):
-            return []
-        
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                return [line.rstrip('\n') for line in lines[-num_lines:]]
+            return self.read_lines_before(None, num_lines)["lines"]
         except Exception:
             return []
     
+    def read_lines_before(self, cursor: Optional[str] = None, limit: int = 100) -> Dict:
+        """Up to `limit` lines before `cursor` (newest when None), oldest first; `next_cursor` is None at the oldest file."""
+        log_files = sorted(self.get_all_log_files(), key=self._rotation_number)
+        end = None
+        if cursor is not None:
+            inode, end = decode_cursor(cursor)
+            log_files = list(dropwhile(lambda path: os.stat(path).st_ino != inode, log_files))
+        
+        lines = []
+        next_cursor = None
+        for log_file in log_files:
+            if len(lines) >= limit:
+                break
+            offset = end if end is not None else os.path.getsize(log_file)
+            for offset, line in iter_lines_reverse(log_file, end):
+                lines.append(line)
+                if len(lines) >= limit:
+                    break
+            next_cursor = encode_cursor(log_file, offset)
+            end = None
+        
+        if len(lines) < limit:
+            next_cursor = None
+        lines.reverse()
+        return {"lines": lines, "next_cursor": next_cursor}
+    
     def get_log_files(self) -> List[str]:
         if not self.logs_dir.exists():
             return []
@@ -137,29 +281,16 @@ class LoggingService:
             return self.logs_dir / log_files[0]
         return self.logs_dir / self._log_file
     
-    def create_logs_archive(self, archive_name: str = "logs.zip") -> Path:
-        archive_path = Path(archive_name)
-        logger = self.get_logger(__name__)
+    def stream_logs_archive(self, download_all: bool = True, start: Optional[float] = None,
+                            end: Optional[float] = None, archive_format: str = "zip") -> Iterator[bytes]:
+        """Compressed logs, produced chunk by chunk as the caller iterates; nothing is written to disk."""
+        if download_all:
+            log_files = self.get_log_files_in_range(start, end)
+        else:
+            log_files = [self.get_log_file_path()]
         
-        try:
-            with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                if self.logs_dir.exists():
-                    for file_path in self.logs_dir.glob("*.log"):
-                        zipf.write(file_path, arcname=file_path.name)
-                        logger.info(f"Added {file_path.name} to archive")
-            
-            logger.info(f"Created logs archive: {archive_path}")
-            return archive_path
-            
-        except Exception as e:
-            logger.error(f"Error creating logs archive: {str(e)}")
-            raise
-    
-    def cleanup_temp_archive(self, archive_path: Path):
-        logger = self.get_logger(__name__)
-        try:
-            if archive_path.exists():
-                os.remove(archive_path)
-                logger.info(f"Cleaned up temporary archive: {archive_path}")
-        except Exception as e:
-            logger.warning(f"Failed to cleanup archive: {str(e)}")
\ No newline at end of file
+        lines_for = None
+        if start is not None or end is not None:
+            lines_for = lambda log_file: iter_lines_in_range(log_file, start, end)
+        
+        return stream_archive(log_files, archive_format, lines_for)
@@ -1,13 +1,67 @@
-import os
+import time
+import asyncio
 import threading
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
 from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_google_genai import GoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate
+from langchain_core.documents import Document
 from langchain_core.language_models.llms import LLM
 from dependency_injector.wiring import inject, Provide
-from datetime import datetime
+from common.metrics import TOKEN_BUCKETS
+from services.answer_cache import normalize_question
+from services.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from services.llm_provider import create_llm
+
+
+class LLMStreamError(Exception):
+    pass
+
+
+_STREAM_END = object()
+
+
+class _Flight:
+    """One in-flight answer computation; concurrent duplicates follow its chunk buffer."""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.answer: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.done = False
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk: str):
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, answer: Optional[str] = None, error: Optional[BaseException] = None):
+        self.answer = answer
+        self.error = error
+        self.done = True
+        self._notify()
+
+    async def follow(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+    async def result(self) -> str:
+        while not self.done:
+            await self._changed.wait()
+        if self.error is not None:
+            raise self.error
+        return self.answer
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
 
 
 class RAGService:
@@ -15,76 +69,238 @@ class RAGService:
     @inject
     def __init__(self, 
                  config = Provide["Container.config_service"],
-                 logging_service = Provide["Container.logging_service"]):
-        
-        os.environ['GOOGLE_API_KEY'] = os.getenv('GOOGLE_API_KEY')
+                 logging_service = Provide["Container.logging_service"],
+                 answer_cache = Provide["Container.answer_cache"],
+                 context_assembler = Provide["Container.context_assembler"],
+                 embedding_service = Provide["Container.embedding_service"],
+                 db_service = Provide["Container.db_service"],
+                 metrics = Provide["Container.metrics"]):
         
         self.config = config
         self.logger = logging_service.get_logger(__name__)
         
         self.llm: Optional[LLM] = None
         self.vectorstore: Optional[Chroma] = None
+        self.lexical_index: Optional[LexicalIndex] = None
+        self.answer_cache = answer_cache
+        self.context_assembler = context_assembler
+        self.embedding_service = embedding_service
+        self.db_service = db_service
+        self._embedding_seconds = metrics.histogram("rag_embedding_seconds", "Query embedding latency")
+        self._search_seconds = metrics.histogram("rag_vector_search_seconds", "Vector / hybrid search latency")
+        self._prompt_seconds = metrics.histogram("rag_prompt_assembly_seconds", "Prompt assembly latency")
+        self._prompt_tokens = metrics.histogram("rag_prompt_tokens", "Estimated prompt tokens per request", TOKEN_BUCKETS)
+        self._llm_first_token_seconds = metrics.histogram("rag_llm_first_token_seconds", "LLM time to first token")
+        self._llm_seconds = metrics.histogram("rag_llm_seconds", "Total LLM generation time")
+        self._llm_errors = metrics.counter("rag_llm_errors_total", "LLM calls that raised an error")
+        self._index_version = 0
         self._lock = threading.Lock()
+        self._inflight: Dict[Tuple, _Flight] = {}
+        self._flight_leaders = 0
+        self._flight_followers = 0
+        self._flight_tasks: Set[asyncio.Task] = set()
+
+        self._retrieval_executor = ThreadPoolExecutor(
+            max_workers=self.config.retrieval_concurrency,
+            thread_name_prefix="rag-retrieval"
+        )
+        self._llm_executor = ThreadPoolExecutor(
+            max_workers=self.config.llm_concurrency,
+            thread_name_prefix="rag-llm"
+        )
 
     def load_llm_and_db(self) -> Tuple[Optional[LLM], Optional[Chroma]]:
         with self._lock:
-            if self.llm and self.vectorstore:
+            if self.llm is not None and self.vectorstore is not None:
                 self.logger.info("RAG: LLM and DB already initialized")
                 return self.llm, self.vectorstore
             
             self.logger.info("RAG: Initializing LLM and DB")
             try:
-                self.llm = GoogleGenerativeAI(
-                    model=self.config.llm_model_name,
-                    temperature=self.config.temperature,
-                    max_output_tokens=self.config.max_response_tokens,
-                )
+                self.llm = create_llm(self.config)
+                self.logger.info(f"RAG: Using LLM provider '{self.config.llm_provider}' ({self.config.llm_model_name})")
                 
-                embeddings = HuggingFaceEmbeddings(model_name=self.config.embedding_model_name)
-                self.vectorstore = Chroma(
-                    persist_directory=self.config.vector_db_path,
-                    embedding_function=embeddings
-                )
+                self.vectorstore = self.db_service.load_search_index()
+                if self.config.hybrid_enabled:
+                    self.lexical_index = self.db_service.load_lexical_index()
                 self.logger.info("RAG: LLM and Vector DB are ready")
                 return self.llm, self.vectorstore
             except Exception as e:
                 self.logger.error(f"RAG: Initialization error - {e}")
                 return None, None
 
-    def generate_response(self, question: str) -> str:
-        if not self.llm or not self.vectorstore:
+    def set_vectorstore(self, vectorstore: Chroma, lexical_index: Optional[LexicalIndex] = None):
+        with self._lock:
+            self.vectorstore = vectorstore
+            self.lexical_index = lexical_index
+            self._index_version += 1
+        self.answer_cache.clear()
+        self.logger.info(f"RAG: Vector DB swapped (index version {self._index_version})")
+
+    def knowledge_version(self) -> Tuple[int, int]:
+        return self._index_version, hash(self.config.system_prompt)
+
+    async def agenerate_response(self, question: str) -> str:
+        if self.llm is None or self.vectorstore is None:
             return "Lỗi: Hệ thống đang bảo trì, vui lòng thử lại sau."
-        
-        retriever = self.vectorstore.as_retriever(search_kwargs={"k": self.config.retrieval_k_chunks})
-        retrieved_docs = retriever.invoke(question)
-        context_text = "\n\n".join([" ".join(doc.page_content.split()) for doc in retrieved_docs])
-
-        template = (
-            "{system_prompt}"
-            "NGỮ CẢNH:\n"
-            "--- Bối cảnh dữ liệu hiện tại (Ngày {current_date}) ---\n"
-            "{context}\n"
-            "--- KẾT THÚC NGỮ CẢNH ---\n\n"
-            "Câu hỏi của sinh viên:\n"
-            "{question}\n\n"
-            "Hãy đưa ra câu trả lời trực tiếp:"
-        )
 
-        rag_prompt = PromptTemplate(
-            template=template,
-            input_variables=["context", "question", "system_prompt"]
-        )
+        version = self.knowledge_version()
+        normalized = normalize_question(question)
+        cached = self.answer_cache.get_exact(normalized, version)
+        if cached is not None:
+            return cached
 
-        final_prompt = rag_prompt.format(
-            context=context_text,
-            current_date=datetime.now().strftime("%d/%m/%Y"),
-            system_prompt=self.config.system_prompt,
-            question=question
-        )
+        flight = self._join_flight(question, normalized, version)
+        try:
+            return await flight.result()
+        except LLMStreamError:
+            return "Lỗi kết nối AI."
+
+    async def astream_response(self, question: str) -> AsyncIterator[str]:
+        if self.llm is None or self.vectorstore is None:
+            yield "Lỗi: Hệ thống đang bảo trì, vui lòng thử lại sau."
+            return
 
+        version = self.knowledge_version()
+        normalized = normalize_question(question)
+        cached = self.answer_cache.get_exact(normalized, version)
+        if cached is not None:
+            yield cached
+            return
+
+        flight = self._join_flight(question, normalized, version)
+        async for chunk in flight.follow():
+            yield chunk
+
+    def coalescing_stats(self) -> Dict:
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self._flight_leaders,
+            "coalesced": self._flight_followers
+        }
+
+    def shutdown(self):
+        self._retrieval_executor.shutdown(wait=False, cancel_futures=True)
+        self._llm_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _join_flight(self, question: str, normalized: str, version) -> "_Flight":
+        key = (normalized, version)
+        flight = self._inflight.get(key)
+        if flight is not None:
+            self._flight_followers += 1
+            return flight
+
+        flight = _Flight()
+        self._inflight[key] = flight
+        self._flight_leaders += 1
+        task = asyncio.create_task(self._lead_flight(flight, key, question))
+        self._flight_tasks.add(task)
+        task.add_done_callback(self._flight_tasks.discard)
+        return flight
+
+    async def _lead_flight(self, flight: "_Flight", key: Tuple, question: str):
+        normalized, version = key
+        loop = asyncio.get_running_loop()
         try:
-            response = self.llm.invoke(final_prompt)
-            return response if response else "Không có phản hồi từ AI."
+            with self._embedding_seconds.time():
+                query_vector = await self.embedding_service.aembed_query(question)
+            cached = self.answer_cache.get_similar(query_vector, version)
+            if cached is not None:
+                flight.publish(cached)
+                flight.finish(cached)
+                return
+
+            retrieved_docs = await loop.run_in_executor(
+                self._retrieval_executor, self._search, question, query_vector
+            )
+            final_prompt = self._build_prompt(question, retrieved_docs)
+
+            async for chunk in self._stream_llm(final_prompt):
+                flight.publish(chunk)
+
+            flight.finish(self._finish_response(normalized, query_vector, "".join(flight.chunks), version))
+        except asyncio.CancelledError:
+            flight.finish(error=LLMStreamError("Generation cancelled"))
+            raise
         except Exception as e:
-            self.logger.error(f"LLM API error: {e}")
-            return "Lỗi kết nối AI."
\ No newline at end of file
+            flight.finish(error=e)
+        finally:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+
+    async def _stream_llm(self, final_prompt: str) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def publish(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                cancelled.set()
+
+        def produce():
+            try:
+                for chunk in self.llm.stream(final_prompt):
+                    if cancelled.is_set():
+                        return
+                    if chunk:
+                        publish(chunk)
+                publish(_STREAM_END)
+            except Exception as e:
+                self._llm_errors.inc()
+                self.logger.error(f"LLM API error: {e}")
+                publish(LLMStreamError(str(e)))
+
+        start = time.perf_counter()
+        loop.run_in_executor(self._llm_executor, produce)
+
+        first_token = True
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    self._llm_seconds.observe(time.perf_counter() - start)
+                    break
+                if isinstance(item, LLMStreamError):
+                    raise item
+                if first_token:
+                    self._llm_first_token_seconds.observe(time.perf_counter() - start)
+                    first_token = False
+                yield item
+        finally:
+            cancelled.set()
+
+    def _search(self, question: str, query_vector: List[float]) -> List[Document]:
+        with self._search_seconds.time():
+            return self._search_index(question, query_vector)
+
+    def _search_index(self, question: str, query_vector: List[float]) -> List[Document]:
+        k = self.config.retrieval_k_chunks
+        lexical_index = self.lexical_index
+        if lexical_index is None:
+            return self.vectorstore.similarity_search_by_vector(query_vector, k=k)
+
+        candidates = max(self.config.hybrid_candidates, k)
+        dense_docs = self.vectorstore.similarity_search_by_vector(query_vector, k=candidates)
+        lexical_docs = [doc for doc, _ in lexical_index.search(question, k=candidates)]
+        return reciprocal_rank_fusion([dense_docs, lexical_docs], k=k, rrf_k=self.config.rrf_k)
+
+    def _build_prompt(self, question: str, retrieved_docs: List[Document]) -> str:
+        with self._prompt_seconds.time():
+            prompt = self.context_assembler.assemble(question, self.config.system_prompt, retrieved_docs)
+        self._prompt_tokens.observe(prompt.prompt_tokens)
+        self.logger.info(
+            f"RAG: Prompt {prompt.prompt_tokens} tokens (context {prompt.context_tokens}, "
+            f"{prompt.chunks_used} chunks used, {prompt.chunks_trimmed} trimmed, {prompt.chunks_dropped} dropped)"
+        )
+        return prompt.text
+
+    def _finish_response(self, normalized: str, query_vector: List[float], response: Optional[str], version) -> str:
+        if response is None:
+            return "Lỗi kết nối AI."
+        if not response.strip():
+            return "Không có phản hồi từ AI."
+
+        self.answer_cache.put(normalized, query_vector, response, version)
+        return response
@@ -0,0 +1,107 @@
+import os
+import json
+from typing import Dict, List
+import numpy as np
+from langchain_core.documents import Document
+
+EMBEDDINGS_FILE = "embeddings.npy"
+CHUNKS_FILE = "chunks.json"
+_EXPORT_BATCH_SIZE = 256
+
+
+class NumpyVectorIndex:
+
+    def __init__(self, ids: List[str], texts: List[str], metadatas: List[Dict], matrix: np.ndarray):
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.matrix = matrix
+
+    @classmethod
+    def from_embeddings(
+        cls,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict],
+        embeddings: List[List[float]]
+    ) -> "NumpyVectorIndex":
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2:
+            matrix = matrix.reshape(len(ids), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0.0] = 1.0
+        matrix = np.ascontiguousarray(matrix / norms, dtype=np.float32)
+        return cls(list(ids), list(texts), [dict(m or {}) for m in metadatas], matrix)
+
+    @classmethod
+    def from_chroma(cls, vectorstore) -> "NumpyVectorIndex":
+        ids, texts, metadatas, embeddings = [], [], [], []
+        offset = 0
+        while True:
+            stored = vectorstore.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=_EXPORT_BATCH_SIZE,
+                offset=offset
+            )
+            if not stored["ids"]:
+                break
+            ids.extend(stored["ids"])
+            texts.extend(stored["documents"])
+            metadatas.extend(stored["metadatas"])
+            embeddings.extend(stored["embeddings"])
+            offset += len(stored["ids"])
+        if not ids:
+            return cls([], [], [], np.zeros((0, 0), dtype=np.float32))
+        return cls.from_embeddings(ids, texts, metadatas, embeddings)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "NumpyVectorIndex":
+        with open(os.path.join(path, CHUNKS_FILE), 'r', encoding='utf-8') as f:
+            chunks = json.load(f)
+        matrix = np.load(os.path.join(path, EMBEDDINGS_FILE), mmap_mode='r' if mmap else None)
+        return cls(chunks["ids"], chunks["texts"], chunks["metadatas"], matrix)
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return (
+            os.path.exists(os.path.join(path, EMBEDDINGS_FILE))
+            and os.path.exists(os.path.join(path, CHUNKS_FILE))
+        )
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, EMBEDDINGS_FILE), np.ascontiguousarray(self.matrix, dtype=np.float32))
+        with open(os.path.join(path, CHUNKS_FILE), 'w', encoding='utf-8') as f:
+            json.dump({"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas}, f, ensure_ascii=False)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_scores(embedding, k)]
+
+    def similarity_search_by_vector_with_scores(self, embedding: List[float], k: int = 4) -> List[tuple]:
+        count = len(self.ids)
+        if count == 0 or k <= 0:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0 or query.shape[0] != self.matrix.shape[1]:
+            return []
+
+        scores = self.matrix @ (query / norm)
+        if k < count:
+            top = np.argpartition(scores, count - k)[count - k:]
+        else:
+            top = np.arange(count)
+        top = top[np.argsort(scores[top])[::-1]]
+
+        return [(self._document(int(i)), float(scores[i])) for i in top]
+
+    def _document(self, index: int) -> Document:
+        return Document(
+            id=self.ids[index],
+            page_content=self.texts[index],
+            metadata=self.metadatas[index]
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
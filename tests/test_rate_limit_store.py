@@ -0,0 +1,114 @@
+import os
+import asyncio
+import time
+import pytest
+from middleware.rate_limit_store import InMemoryBucketStore, RedisBucketStore, SharedMemoryBucketStore
+
+try:
+    import fakeredis
+    import lupa  # noqa: F401  (fakeredis needs it to run Lua scripts)
+except ImportError:
+    fakeredis = None
+
+needs_fakeredis = pytest.mark.skipif(fakeredis is None, reason="fakeredis[lua] not installed")
+
+
+def _redis_store():
+    return RedisBucketStore(client=fakeredis.FakeAsyncRedis())
+
+
+STORES = [
+    pytest.param(InMemoryBucketStore, id="memory"),
+    pytest.param(lambda: SharedMemoryBucketStore(slots=64, stripes=4), id="shared"),
+    pytest.param(_redis_store, id="redis", marks=needs_fakeredis),
+]
+
+
+@pytest.mark.parametrize("make_store", STORES)
+def test_spends_burst_then_refills(make_store):
+    async def scenario():
+        store = make_store()
+        results = [await store.take("ip:1", 2, 20) for _ in range(3)]
+        assert [allowed for allowed, _ in results] == [True, True, False]
+        assert 0 < results[2][1] <= 0.05
+
+        await asyncio.sleep(0.06)
+        assert (await store.take("ip:1", 2, 20))[0]
+        assert not (await store.take("ip:1", 2, 20))[0]
+        await store.close()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("make_store", STORES)
+def test_forget_resets_bucket_and_keys_are_independent(make_store):
+    async def scenario():
+        store = make_store()
+        assert (await store.take("conn:a", 1, 0.001))[0]
+        assert not (await store.take("conn:a", 1, 0.001))[0]
+        assert (await store.take("conn:b", 1, 0.001))[0]
+
+        await store.forget("conn:a")
+        assert (await store.take("conn:a", 1, 0.001))[0]
+        await store.close()
+
+    asyncio.run(scenario())
+
+
+@needs_fakeredis
+def test_redis_bucket_expires_once_it_would_be_full():
+    async def scenario():
+        client = fakeredis.FakeAsyncRedis()
+        store = RedisBucketStore(client=client, prefix="rl:")
+        await store.take("ip:1", 2, 4)
+
+        ttl = await client.pttl("rl:ip:1")
+        assert 0 < ttl <= 500
+        state = await client.hgetall("rl:ip:1")
+        assert float(state[b"tokens"]) == pytest.approx(1.0)
+
+        time.sleep(0.55)
+        assert not await client.exists("rl:ip:1")
+        assert store.size is None
+        await store.close()
+
+    asyncio.run(scenario())
+
+
+def test_shared_store_counts_occupied_slots():
+    async def scenario():
+        store = SharedMemoryBucketStore(slots=64, stripes=4)
+        for index in range(10):
+            await store.take(f"conn:{index}", 1, 0.001)
+        await store.take("conn:0", 1, 0.001)
+        assert store.size == 10
+        await store.forget("conn:0")
+        assert store.size == 9
+
+    asyncio.run(scenario())
+
+
+def test_shared_store_fails_open_only_while_stripe_is_busy():
+    store = SharedMemoryBucketStore(slots=64, stripes=4)
+    assert store.take_nowait("conn:1", 1, 0.001)[0]
+    _, stripe, _, _ = store._locate("conn:1")
+
+    assert store._acquire(stripe)
+    assert store.take_nowait("conn:1", 1, 0.001)[0]
+    store._release(stripe)
+    assert not store.take_nowait("conn:1", 1, 0.001)[0]
+
+
+def test_shared_store_recovers_stripe_held_by_exited_worker():
+    store = SharedMemoryBucketStore(slots=64, stripes=4)
+    assert store.take_nowait("conn:1", 1, 0.001)[0]
+    _, stripe, _, _ = store._locate("conn:1")
+
+    pid = os.fork()
+    if pid == 0:
+        store._acquire(stripe)
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert store.take_nowait("conn:1", 1, 0.001)[0]
+    assert not store.take_nowait("conn:1", 1, 0.001)[0]